@@ -0,0 +1,177 @@
+"""
+Authentication classes for the API views.
+
+The first entry in `PASSWORD_HASHERS` is Argon2, so checking a password costs
+tens of milliseconds and around 100 MB of memory. Two classes avoid paying that
+on every request:
+
+* `CachedBasicAuthentication` remembers successful basic authentication checks
+  for a short time so repeat requests from the same client skip the hash.
+* `SignedTokenAuthentication` accepts a short-lived signed token issued by the
+  token endpoint after a single password check, and needs no database lookup.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import salted_hmac
+from rest_framework import authentication, exceptions
+
+
+class CredentialCache():
+    """
+    A bounded, TTL-limited, in-process cache of verified credentials.
+
+    Entries are keyed on an HMAC of the username and password under a secret
+    that is generated per process and never stored, so neither the plaintext
+    nor anything that could be checked offline against it is kept in memory.
+    """
+
+    key_salt = 'artgallery.authentication.CredentialCache'
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or getattr(settings, 'CREDENTIAL_CACHE_MAX_ENTRIES', 1024)
+        self.ttl = ttl or getattr(settings, 'CREDENTIAL_CACHE_TTL', 300)
+        self._secret = os.urandom(32)
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def make_key(self, userid, password):
+        return salted_hmac(self.key_salt, userid + '\x00' + password, secret=self._secret, algorithm='sha256').digest()
+
+    def get(self, key):
+        """Return the cached user for `key`, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (user, time.monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_pk):
+        """Drop every cached credential belonging to a user."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_pk, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._keys_by_user.get(entry[0].pk)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry[0].pk]
+
+
+credential_cache = CredentialCache()
+
+
+class CachedBasicAuthentication(authentication.BasicAuthentication):
+    """
+    HTTP basic authentication that only runs the password hasher on a cache miss.
+
+    Failed attempts are never cached. Entries for a user are dropped whenever
+    that :model:`users.User` is saved or deleted (see `users.signals`), and
+    otherwise expire after `CREDENTIAL_CACHE_TTL` seconds, which also bounds how
+    long a change made in another process can go unnoticed.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = credential_cache.make_key(userid, password)
+        user = credential_cache.get(key)
+        if user is not None:
+            return (user, None)
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.set(key, user)
+        return (user, auth)
+
+
+class TokenUser():
+    """
+    The user carried by a signed token.
+
+    Only the id and role are known, which is all `GroupPermissions` needs.
+    """
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, pk, role):
+        self.id = self.pk = pk
+        self.role = role
+
+    def __str__(self):
+        return 'TokenUser {}'.format(self.pk)
+
+
+def token_ttl():
+    """The number of seconds a signed token is accepted for after it is issued."""
+    return getattr(settings, 'SIGNED_TOKEN_TTL', 900)
+
+
+def issue_token(user):
+    """Return a signed token carrying the id and role of `user`."""
+    return signing.dumps({'id': user.pk, 'role': user.role}, salt=SignedTokenAuthentication.salt)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Stateless bearer token authentication, `Authorization: Bearer <token>`.
+
+    Tokens are signed with `SECRET_KEY` and expire after `SIGNED_TOKEN_TTL`
+    seconds. They are checked without touching the database, so a role change
+    or deactivation only takes effect once the user's current token expires.
+    """
+
+    keyword = 'bearer'
+    salt = 'artgallery.authentication.SignedTokenAuthentication'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header. The token should not contain spaces.')
+
+        try:
+            payload = signing.loads(
+                auth[1].decode('ascii'),
+                salt=self.salt,
+                max_age=token_ttl()
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        return (TokenUser(payload['id'], payload['role']), payload)
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,63 @@
+"""
+Fetching a list of records by id in one request.
+
+`?ids=1,5,9` on a list view is resolved with a single `id__in` query and the
+records come back in the order they were asked for, so a client that needs a
+handful of specific records makes one round trip instead of one per record.
+"""
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from artgallery.conditional import queryset_validators
+from artgallery.values import values_serializer
+
+IDS_QUERY_PARAM = 'ids'
+MAX_BATCH_IDS = 100
+
+ids_parameter = OpenApiParameter(
+    IDS_QUERY_PARAM, str,
+    description='Comma separated ids, up to {}. Returns those records in the same order as {{"results": [...], "missing": [...]}} instead of a page.'.format(MAX_BATCH_IDS)
+)
+
+
+def parse_ids(request):
+    """
+    Return the ids asked for without repeats, or None if the parameter is absent.
+    Raises ValueError if it is not a list of up to `MAX_BATCH_IDS` ids.
+    """
+    value = request.query_params.get(IDS_QUERY_PARAM)
+    if value is None:
+        return None
+    ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    if not ids or len(ids) > MAX_BATCH_IDS:
+        raise ValueError(value)
+    return ids
+
+
+def fetch_in_order(rows, ids):
+    """Return the dict `rows` with `ids` in that order, and the ids not found."""
+    found = {row['id']: row for row in rows}
+    return [found[pk] for pk in ids if pk in found], [pk for pk in ids if pk not in found]
+
+
+def ids_response(request, queryset, serializer_class, fields=None):
+    """
+    Return the response to `?ids=` for `queryset`, a 304 if the client's copy
+    is current, or None if no ids were asked for.
+    """
+    try:
+        ids = parse_ids(request)
+    except ValueError:
+        return Response({'message': 'ids must be up to {} comma separated ids'.format(MAX_BATCH_IDS)}, status=status.HTTP_400_BAD_REQUEST)
+    if ids is None:
+        return None
+    queryset = queryset.filter(pk__in=ids)
+    serializer = values_serializer(serializer_class, fields)
+    validators = queryset_validators(request, queryset)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+    found, missing = fetch_in_order(serializer.values(queryset), ids)
+    return validators.apply(Response({'results': serializer.data(found), 'missing': missing}))
@@ -0,0 +1,197 @@
+"""
+Bulk creation and update for the collection endpoints.
+
+A JSON array posted to a collection endpoint is validated item by item with a
+single serializer, and the valid items are inserted with `bulk_create` in
+batches, so a large import costs one request and a handful of inserts rather
+than a request and an insert per item.
+
+JSON cannot carry file uploads, so file fields in a bulk request name files
+that are already in storage, as returned by the API or by a chunked upload.
+
+A bulk update applies one set of changes to a list of ids or to the records
+matching a filter with a single `update()`, without loading any of them.
+"""
+
+import posixpath
+
+from django.core.exceptions import SuspiciousFileOperation, ValidationError as DjangoValidationError
+from django.db.models import BooleanField, FileField
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from artgallery.cache import FeedCache
+
+BULK_BATCH_SIZE = 500
+BULK_MAX_ITEMS = 10000
+
+
+def is_stored_under(name, directory):
+    """
+    Whether the storage name `name` lies inside `directory`, the `upload_to` of
+    a file field, so that a name saved on a record cannot reach other files.
+    """
+    return (
+        bool(directory) and name.startswith(directory) and '\\' not in name
+        and posixpath.normpath(name) == name and not name.startswith(('/', '..'))
+    )
+
+
+class StoredFileField(serializers.CharField):
+    """
+    A file field given as the name or URL of a file that is already in storage
+    under the `upload_to` directory of the model field.
+    """
+
+    default_error_messages = {
+        'missing': 'No file named "{name}" is in storage.',
+        'outside': 'Files must be stored under "{directory}".',
+    }
+
+    def __init__(self, storage, upload_to, **kwargs):
+        self.storage = storage
+        self.upload_to = upload_to
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        name = super().to_internal_value(data)
+        base_url = getattr(self.storage, 'base_url', None) or ''
+        if base_url and name.startswith(base_url):
+            name = name[len(base_url):]
+        name = name.lstrip('/')
+        if not is_stored_under(name, self.upload_to):
+            self.fail('outside', directory=self.upload_to)
+        try:
+            exists = self.storage.exists(name)
+        except (DjangoValidationError, SuspiciousFileOperation):
+            exists = False
+        if not exists:
+            self.fail('missing', name=name)
+        return name
+
+
+def bulk_serializer_class(serializer_class):
+    """Return `serializer_class` with its file fields replaced by `StoredFileField`."""
+    model = serializer_class.Meta.model
+    attrs = {}
+    for name in serializer_class.Meta.fields:
+        field = model._meta.get_field(name)
+        if isinstance(field, FileField):
+            attrs[name] = StoredFileField(field.storage, field.upload_to, required=not field.blank, allow_blank=field.blank)
+    return type('Bulk' + serializer_class.__name__, (serializer_class,), attrs)
+
+
+def is_bulk_request(request):
+    return request.content_type.startswith('application/json') and isinstance(request.data, list)
+
+
+def bulk_create(serializer_class, items, batch_size=BULK_BATCH_SIZE):
+    """
+    Validate every item in `items` and insert the valid ones.
+
+    Returns `(created, errors)`, the number of records inserted and a list of
+    `{'index': i, 'errors': {...}}` for each item that was rejected.
+    """
+    model = serializer_class.Meta.model
+    # One serializer is reused for every item, so its fields are only built once.
+    serializer = bulk_serializer_class(serializer_class)()
+    instances = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            validated_data = serializer.run_validation(item)
+        except serializers.ValidationError as error:
+            detail = error.detail if isinstance(error.detail, dict) else {'non_field_errors': error.detail}
+            errors.append({'index': index, 'errors': detail})
+            continue
+        instance = model(**validated_data)
+        # `bulk_create` skips `save`, so fields that `save` derives are set here.
+        if hasattr(instance, 'set_derived_fields'):
+            instance.set_derived_fields()
+        instances.append(instance)
+
+    if instances:
+        model.objects.bulk_create(instances, batch_size=batch_size)
+        # `bulk_create` sends no signals, so the feeds are invalidated here.
+        FeedCache(model).invalidate()
+    return len(instances), errors
+
+
+def bulk_create_response(serializer_class, items):
+    """
+    Create `items` and return a response with the number created and the errors
+    for each rejected item. The status is 201 if anything was created.
+    """
+    if len(items) > BULK_MAX_ITEMS:
+        return Response({'message': 'At most {} items can be created at once'.format(BULK_MAX_ITEMS)}, status=status.HTTP_400_BAD_REQUEST)
+    created, errors = bulk_create(serializer_class, items)
+    return Response(
+        {'created': created, 'errors': errors},
+        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _validate_fields(serializer, data, allowed, name):
+    """Validate `data` with the serializer fields named in `allowed`."""
+    if not isinstance(data, dict) or not data:
+        raise serializers.ValidationError({name: ['Expected a non-empty object.']})
+    unknown = [field for field in data if field not in allowed]
+    if unknown:
+        raise serializers.ValidationError({name: ['These fields cannot be used here: ' + ', '.join(unknown)]})
+    validated = {}
+    errors = {}
+    for field, value in data.items():
+        try:
+            validated[field] = serializer.fields[field].run_validation(value)
+        except serializers.ValidationError as error:
+            errors[field] = error.detail
+    if errors:
+        raise serializers.ValidationError({name: errors})
+    return validated
+
+
+def bulk_update(serializer_class, data, update_fields, filter_fields):
+    """
+    Apply `data['set']` to the records listed in `data['ids']` or matching
+    `data['filter']` and return how many were updated.
+
+    Only `update_fields` may be changed and only `filter_fields` may be filtered
+    on. Neither may include fields that `save` derives others from, since
+    `update()` skips `save`.
+    """
+    model = serializer_class.Meta.model
+    if not isinstance(data, dict):
+        raise serializers.ValidationError({'non_field_errors': ['Expected an object with ids or filter, and set.']})
+    serializer = serializer_class(partial=True)
+    changes = _validate_fields(serializer, data.get('set'), update_fields, 'set')
+
+    ids, filters = data.get('ids'), data.get('filter')
+    if (ids is None) == (filters is None):
+        raise serializers.ValidationError({'non_field_errors': ['Give either ids or filter.']})
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or len(ids) > BULK_MAX_ITEMS or not all(isinstance(pk, int) for pk in ids):
+            raise serializers.ValidationError({'ids': ['Expected a list of up to {} ids.'.format(BULK_MAX_ITEMS)]})
+        queryset = model.objects.filter(pk__in=ids)
+    else:
+        lookups = {}
+        for field, value in _validate_fields(serializer, filters, filter_fields, 'filter').items():
+            if isinstance(model._meta.get_field(field), BooleanField):
+                lookups[field + '__in'] = [value] #workaround for bug in Django querysets for booleans
+            else:
+                lookups[field] = value
+        queryset = model.objects.filter(**lookups)
+
+    # `update()` skips `auto_now`, so the modification time is set here.
+    updated = queryset.update(last_modified=timezone.now(), **changes)
+    if updated:
+        FeedCache(model).invalidate()
+    return updated
+
+
+def bulk_update_response(serializer_class, data, update_fields, filter_fields):
+    try:
+        updated = bulk_update(serializer_class, data, update_fields, filter_fields)
+    except serializers.ValidationError as error:
+        return Response(error.detail, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'updated': updated})
@@ -0,0 +1,101 @@
+"""
+A cache of rendered responses for the busiest read-only feeds.
+
+Entries are grouped under a generation token per model. Saving or deleting any
+record of the model replaces its token (see the `signals` module of each app),
+which orphans every entry made before the change in a single cache write, and
+the orphans then expire or are culled by the backend. A hit costs two cache
+lookups and no database queries, however large the collection is.
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from artgallery.conditional import Validators
+
+CACHED_HEADERS = ('Content-Type', 'ETag')
+
+
+class FeedCache():
+    """
+    Rendered responses of the list views over `model`.
+
+    Responses are keyed on the path, the query string and the media type chosen
+    by content negotiation, so each page and each format is stored separately.
+    Views must run their permission checks before calling `get`, and pass the
+    generation it returns to `store`.
+    """
+
+    def __init__(self, model):
+        self.label = model._meta.label
+        self.generation_key = 'feed-generation:' + self.label
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'FEED_CACHE_ALIAS', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+
+    def get_generation(self):
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            generation = self.invalidate()
+        return generation
+
+    def invalidate(self):
+        """Start a new generation, so every response cached so far is ignored."""
+        generation = uuid.uuid4().hex
+        self.cache.set(self.generation_key, generation, None)
+        return generation
+
+    def make_key(self, request, generation):
+        digest = hashlib.sha1('\x00'.join((
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            getattr(request, 'accepted_media_type', '') or '',
+        )).encode()).hexdigest()
+        return 'feed:{}:{}:{}'.format(self.label, generation, digest)
+
+    def get(self, request):
+        """
+        Return the cached response for `request`, or a 304 if the client's copy
+        is current, or None on a miss, along with the generation looked up.
+        """
+        generation = self.get_generation()
+        entry = self.cache.get(self.make_key(request, generation))
+        if entry is None:
+            return None, generation
+        content, headers = entry
+        etag = dict(headers).get('ETag')
+        if etag is not None:
+            not_modified = Validators(etag).not_modified(request)
+            if not_modified is not None:
+                return not_modified, generation
+        response = HttpResponse(content)
+        for name, value in headers:
+            response[name] = value
+        return response, generation
+
+    def store(self, request, response, generation):
+        """
+        Arrange for `response` to be cached under `generation`, the one `get`
+        returned before the database was read, once it has been rendered, and
+        return it. Only successful responses are stored.
+        """
+        # A change made after `get` starts a new generation, so a response that
+        # races it is stored under the old one and never served.
+        key = self.make_key(request, generation)
+
+        def callback(rendered):
+            if rendered.status_code == 200:
+                headers = [(name, rendered[name]) for name in CACHED_HEADERS if rendered.has_header(name)]
+                self.cache.set(key, (rendered.content, headers), self.timeout)
+
+        response.add_post_render_callback(callback)
+        return response
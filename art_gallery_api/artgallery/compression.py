@@ -0,0 +1,213 @@
+"""
+Response compression middleware.
+
+Responses are compressed with the best coding that both sides support: brotli
+if the brotli package is installed, then zstd if the zstandard package is, and
+gzip otherwise. The client's `Accept-Encoding` q-values come first and the
+order above breaks ties.
+
+A response is left alone when it is smaller than `COMPRESSION_MIN_SIZE` bytes,
+when its media type is already compressed (images, video, audio and archives),
+when it is already encoded, or when it is a range of a larger body. Streaming
+responses are compressed as they are sent, and each chunk is handed on as soon
+as the compressor gives back output, so memory use stays flat.
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+# Brotli's top quality is far too slow to run on every response.
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+"""
+Media types that are compressed already, so a second pass only costs time.
+Entries ending in '/' match the whole type. SVG is text, so it is compressed.
+"""
+COMPRESSED_TYPES = (
+    'image/',
+    'video/',
+    'audio/',
+    'font/woff',
+    'font/woff2',
+    'application/gzip',
+    'application/x-gzip',
+    'application/zip',
+    'application/zstd',
+    'application/x-7z-compressed',
+    'application/x-rar-compressed',
+    'application/x-bzip2',
+    'application/x-xz',
+)
+COMPRESSIBLE_TYPES = ('image/svg+xml',)
+
+_coding_re = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+class _Gzip():
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli():
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd():
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_codings():
+    """Return the content codings that can be produced, most preferred first."""
+    codings = {}
+    if brotli is not None:
+        codings['br'] = _Brotli
+    if zstandard is not None:
+        codings['zstd'] = _Zstd
+    codings['gzip'] = _Gzip
+    return codings
+
+
+CODINGS = available_codings()
+
+
+def choose_coding(accept_encoding, codings=CODINGS):
+    """
+    Return the name of the coding in `codings` the `Accept-Encoding` header
+    value rates highest, or None if it accepts none of them.
+    """
+    qualities = {}
+    for part in accept_encoding.split(','):
+        match = _coding_re.match(part)
+        if match is None:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        qualities[match[1].lower()] = quality
+
+    best, best_quality = None, 0.0
+    # `codings` is ordered by preference, so only a higher q-value wins.
+    for name in codings:
+        quality = qualities.get(name, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type in COMPRESSIBLE_TYPES:
+        return True
+    return not any(
+        media_type.startswith(prefix) if prefix.endswith('/') else media_type == prefix
+        for prefix in COMPRESSED_TYPES
+    )
+
+
+def compress_sequence(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(chunks, compressor):
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware():
+    """
+    Compress responses for clients that accept it. Place it above any middleware
+    that reads or changes the response body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @property
+    def min_size(self):
+        return getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.has_header('Content-Range') or response.status_code == 206:
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        # The body now depends on Accept-Encoding, so caches must key on it
+        # even for clients that get it uncompressed.
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        coding = choose_coding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+        compressor = CODINGS[coding]()
+
+        if response.streaming:
+            if getattr(response, 'is_async', False):
+                response.streaming_content = acompress_sequence(response.streaming_content, compressor)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content, compressor)
+            del response['Content-Length']
+        else:
+            content = compressor.compress(response.content) + compressor.finish()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        # The compressed body differs byte for byte, so a strong ETag would
+        # no longer be true of it.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        response['Content-Encoding'] = coding
+        return response
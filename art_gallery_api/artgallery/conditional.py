@@ -0,0 +1,100 @@
+"""
+Conditional GET support for the list and detail views.
+
+Every model has an indexed `last_modified` that changes on each save, so the
+validators can be worked out with small queries before anything is fetched in
+full or serialised:
+
+* A detail view uses the id and `last_modified` of the record.
+* A list view uses the newest `last_modified` and the number of matching
+  records, which together change on every insert, update and delete. An
+  unfiltered list takes the number from the collection metadata.
+
+A client that sends back the `ETag` in `If-None-Match`, or the `Last-Modified`
+date in `If-Modified-Since` for a detail view, gets a 304 with no body when
+nothing has changed.
+"""
+
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from artgallery.mongo import collection
+
+
+class Validators():
+    """The `ETag` and optional `Last-Modified` date of a response."""
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def timestamp(self):
+        if self.last_modified is None:
+            return None
+        return timegm(self.last_modified.utctimetuple())
+
+    def not_modified(self, request):
+        """Return a 304 response if the client's copy is current, otherwise None."""
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.timestamp)
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        """Add the validators to `response` and return it."""
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.timestamp)
+        return response
+
+
+def make_etag(request, *parts):
+    """
+    Return a weak ETag over `parts`, the request's query string and the media
+    type it accepts, since each of those changes the body that is sent back.
+    """
+    digest = hashlib.sha1()
+    for part in parts + (request.META.get('QUERY_STRING', ''), request.META.get('HTTP_ACCEPT', '')):
+        digest.update(str(part).encode())
+        digest.update(b'\x00')
+    return 'W/' + quote_etag(digest.hexdigest())
+
+
+def _queryset_state(queryset):
+    latest = queryset.order_by('-last_modified').values_list('last_modified', flat=True).first()
+    if queryset.query.has_filters():
+        count = queryset.count()
+    else:
+        # Counting a whole collection reads every document, while its metadata
+        # holds the same number, as `KeysetPagination` relies on for totals.
+        count = collection(queryset.model).estimated_document_count()
+    return (queryset.model._meta.label, latest and latest.isoformat(), count)
+
+
+def queryset_validators(request, queryset, *related):
+    """
+    Validators for a list of `queryset`, whose body may also depend on the
+    `related` querysets. No `Last-Modified` is given because a delete can change
+    the list without changing its newest `last_modified`.
+    """
+    parts = []
+    for each in (queryset,) + related:
+        parts.extend(_queryset_state(each))
+    return Validators(make_etag(request, *parts))
+
+
+def instance_validators(request, model, pk, last_modified, *parts):
+    """Validators for the record `pk` of `model`, plus any other `parts` of its body."""
+    return Validators(
+        make_etag(request, model._meta.label, pk, last_modified.isoformat(), *parts),
+        last_modified
+    )
+
+
+def last_modified_of(model, pk):
+    """Return the `last_modified` of record `pk` without fetching the rest of it, or None."""
+    return model.objects.filter(pk=pk).values_list('last_modified', flat=True).first()
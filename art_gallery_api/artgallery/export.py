@@ -0,0 +1,123 @@
+"""
+Bulk export of the catalogue as NDJSON or CSV.
+
+Rows are read with `.values().iterator()`, which walks a database cursor in
+chunks without building model instances, and each row is encoded and handed on
+as soon as it is read. Memory use therefore stays constant however large the
+export is. The export endpoint and the `export_catalogue` command share this
+module.
+"""
+
+import csv
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from artgallery.renderers import dumps
+from artgallery.values import values_serializer
+from artists.models import Artist
+from artists.serializers import ArtistSerializer
+from artworks.models import Artwork
+from artworks.serializers import ArtworkSerializer
+from videos.models import Video
+from videos.serializers import VideoSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_OUTPUTS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+"""
+Each exportable type maps to its model and to the serializer whose fields make
+up a full export, so an export carries the same fields as the API.
+"""
+EXPORTABLE = {
+    'artworks': (Artwork, ArtworkSerializer),
+    'artists': (Artist, ArtistSerializer),
+    'videos': (Video, VideoSerializer),
+}
+
+
+def parse_fields(name, fields=None):
+    """
+    Return the fields to export for type `name` from a comma separated list, or
+    every field if `fields` is empty. Raises ValueError on an unknown field.
+    """
+    allowed = list(EXPORTABLE[name][1].Meta.fields)
+    if not fields:
+        return allowed
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in allowed]
+    if unknown or not selected:
+        raise ValueError('Unknown fields: ' + ', '.join(unknown))
+    return selected
+
+
+def parse_modified_since(value):
+    """Parse an ISO 8601 date and time, raising ValueError if it is not one."""
+    if not value:
+        return None
+    modified_since = parse_datetime(value)
+    if modified_since is None:
+        raise ValueError('modified_since must be an ISO 8601 date and time')
+    if timezone.is_naive(modified_since):
+        modified_since = timezone.make_aware(modified_since, timezone.utc)
+    return modified_since
+
+
+def export_rows(name, fields, modified_since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield a dict for every record of type `name`, oldest modification first,
+    holding `fields` in the form the API shows them.
+    """
+    model, serializer_class = EXPORTABLE[name]
+    queryset = model.objects.order_by('last_modified', 'id')
+    if modified_since is not None:
+        queryset = queryset.filter(last_modified__gte=modified_since)
+
+    # The list views' converters turn stored names into URLs, and the names
+    # in `thumbnails` into its `{width: url}` map, the way the serializers do.
+    serializer = values_serializer(serializer_class, fields)
+    for row in serializer.values(queryset).iterator(chunk_size=chunk_size):
+        represented = serializer.to_representation(row)
+        yield {field: represented[field] for field in fields}
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+class _Line():
+    """A file-like object that hands back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows, fields):
+    writer = csv.writer(_Line())
+    encoder = JSONEncoder()
+
+    def cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, (dict, list)):
+            return dumps(value).decode('utf-8')
+        # Dates and times are written the same way as in the JSON output.
+        return encoder.default(value)
+
+    yield writer.writerow(fields).encode('utf-8')
+    for row in rows:
+        yield writer.writerow([cell(row[field]) for field in fields]).encode('utf-8')
+
+
+def render(output, rows, fields):
+    """Return an iterator of UTF-8 chunks encoding `rows` as `output`."""
+    if output == 'csv':
+        return render_csv(rows, fields)
+    return render_ndjson(rows)
@@ -0,0 +1,65 @@
+"""
+Facet counts for the browse views.
+
+All the counts for a model come from a single aggregation run inside MongoDB,
+with one `$group` per field under a `$facet` stage, so only the counts are
+sent back rather than every document. `grouped_counts` does the same for one
+field over a given set of values, such as the artworks of a page of artists.
+"""
+
+from artgallery.mongo import collection
+
+
+def facet_match(request, fields, boolean_fields=()):
+    """
+    Build a `$match` document from query parameters named after facet fields, so
+    counts can be taken over a filtered subset. Repeating a parameter matches any
+    of its values, and boolean fields accept `true` or `false`.
+    """
+    match = {}
+    for field in fields:
+        values = request.GET.getlist(field)
+        if not values:
+            continue
+        if field in boolean_fields:
+            try:
+                values = [{'true': True, 'false': False}[value.lower()] for value in values]
+            except KeyError:
+                raise ValueError('{} must be true or false'.format(field))
+        match[field] = values[0] if len(values) == 1 else {'$in': values}
+    return match
+
+
+def facet_counts(model, fields, match=None):
+    """
+    Return `{field: [{'value': value, 'count': count}, ...]}` for the documents of
+    `model` that satisfy `match`, with the most common values first.
+    """
+    pipeline = []
+    if match:
+        pipeline.append({'$match': match})
+    pipeline.append({'$facet': {
+        field: [
+            {'$group': {'_id': '$' + field, 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1, '_id': 1}},
+        ]
+        for field in fields
+    }})
+    result = next(iter(collection(model).aggregate(pipeline)), {})
+    return {
+        field: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in result.get(field, [])]
+        for field in fields
+    }
+
+
+def grouped_counts(model, field, values):
+    """
+    Return `{value: count}` for the documents of `model` whose `field` is one of
+    `values`, from a single `$group` after an indexed `$match`. Values with no
+    documents are left out.
+    """
+    pipeline = [
+        {'$match': {field: {'$in': list(values)}}},
+        {'$group': {'_id': '$' + field, 'count': {'$sum': 1}}},
+    ]
+    return {group['_id']: group['count'] for group in collection(model).aggregate(pipeline)}
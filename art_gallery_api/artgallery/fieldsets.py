@@ -0,0 +1,66 @@
+"""
+Sparse fieldsets for the list and detail views.
+
+`?fields=id,title,thumbnail` limits a response to the named fields and
+`?exclude=provenance_text` drops the named ones. The same selection is pushed
+down to the query with `.only()`, so the fields that are left out are neither
+fetched from MongoDB nor encoded.
+"""
+
+from drf_spectacular.utils import OpenApiParameter
+
+from artgallery.pagination import KeysetPagination
+
+FIELDS_QUERY_PARAM = 'fields'
+EXCLUDE_QUERY_PARAM = 'exclude'
+
+fieldset_parameters = [
+    OpenApiParameter(FIELDS_QUERY_PARAM, str, description='Comma separated fields to include. Defaults to every field.'),
+    OpenApiParameter(EXCLUDE_QUERY_PARAM, str, description='Comma separated fields to leave out.'),
+]
+
+
+class SparseFieldsMixin():
+    """
+    A serializer mixin taking a `fields` argument, the names of the fields to
+    keep. Every field is kept when it is None.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def sparse_fields(request, serializer_class, extra=()):
+    """
+    Return the names of the fields asked for, in serializer order followed by
+    any `extra` fields the view adds itself, or None for all of them. Raises
+    ValueError on an unknown field.
+    """
+    include = request.query_params.get(FIELDS_QUERY_PARAM)
+    exclude = request.query_params.get(EXCLUDE_QUERY_PARAM)
+    if include is None and exclude is None:
+        return None
+    available = list(serializer_class().fields) + list(extra)
+    include = _split(include) if include is not None else available
+    exclude = _split(exclude) if exclude is not None else []
+    unknown = [name for name in include + exclude if name not in available]
+    if unknown:
+        raise ValueError('Unknown fields: ' + ', '.join(unknown))
+    return [name for name in available if name in include and name not in exclude]
+
+
+def project(queryset, fields):
+    """
+    Limit `queryset` to `fields`, keeping the fields that pagination and the
+    conditional GET validators rely on.
+    """
+    if fields is None:
+        return queryset
+    return queryset.only(*dict.fromkeys(list(fields) + list(KeysetPagination.ordering)))
@@ -0,0 +1,128 @@
+"""
+Geohash helpers for the spatial filters on artworks.
+
+A geohash interleaves the bits of a longitude and latitude into a base 32 string,
+so points that share a prefix lie in the same grid cell. Storing the hash in an
+indexed field turns "points inside this box" into a handful of prefix range
+scans on that index, followed by an exact check on the coordinates.
+"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+MAX_COVER_CELLS = 32
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Return the geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            value, bounds = longitude, lon_range
+        else:
+            value, bounds = latitude, lat_range
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """Return the `(latitude, longitude)` span in degrees of a cell at `precision`."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def cover(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Return a set of geohash prefixes whose cells together cover the box.
+
+    The finest precision that needs no more than `max_cells` cells is used, so
+    the cover stays close to the box without turning into a long list of ranges.
+    Boxes that cross the antimeridian (`min_lon > max_lon`) are split in two.
+    """
+    if min_lon > max_lon:
+        return (cover(min_lat, min_lon, max_lat, 180.0, max_cells // 2)
+                | cover(min_lat, -180.0, max_lat, max_lon, max_cells // 2))
+
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        lat_step, lon_step = cell_size(candidate)
+        rows = math.floor(max_lat / lat_step) - math.floor(min_lat / lat_step) + 1
+        columns = math.floor(max_lon / lon_step) - math.floor(min_lon / lon_step) + 1
+        if rows * columns > max_cells:
+            break
+        precision = candidate
+
+    lat_step, lon_step = cell_size(precision)
+    prefixes = set()
+    lat = (math.floor(min_lat / lat_step) + 0.5) * lat_step
+    while lat - lat_step / 2 <= max_lat:
+        lon = (math.floor(min_lon / lon_step) + 0.5) * lon_step
+        while lon - lon_step / 2 <= max_lon:
+            prefixes.add(encode(min(max(lat, -90.0), 90.0), min(max(lon, -180.0), 180.0), precision))
+            lon += lon_step
+        lat += lat_step
+    return prefixes
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Return the great circle distance between two points in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return the `(min_lat, min_lon, max_lat, max_lon)` box around a circle. Circles
+    that reach a pole span every longitude.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = latitude - lat_delta
+    max_lat = latitude + lat_delta
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    lon_delta = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude)))))
+    return min_lat, _wrap_longitude(longitude - lon_delta), max_lat, _wrap_longitude(longitude + lon_delta)
+
+
+def _wrap_longitude(longitude):
+    if longitude < -180.0:
+        return longitude + 360.0
+    if longitude > 180.0:
+        return longitude - 360.0
+    return longitude
+
+
+def parse_floats(value, count):
+    """Parse a comma separated list of exactly `count` numbers, raising ValueError otherwise."""
+    numbers = [float(part) for part in value.split(',')]
+    if len(numbers) != count or not all(math.isfinite(number) for number in numbers):
+        raise ValueError(value)
+    return numbers
+
+
+def check_point(latitude, longitude):
+    if not -90.0 <= latitude <= 90.0 or not -180.0 <= longitude <= 180.0:
+        raise ValueError((latitude, longitude))
@@ -0,0 +1,275 @@
+"""
+Resized copies of stored images, in the best format the client accepts.
+
+A variant is named by the source image and the requested width, height,
+quality and format. Rendered variants are kept in `IMAGE_CACHE_DIR` as one
+file each, and once the directory holds more than `IMAGE_CACHE_MAX_BYTES` the
+least recently used files are deleted. Use is recorded in each file's
+modification time, so the order survives restarts and is shared by processes
+using the same directory. The size is not: each process counts the files it
+finds when it starts plus the ones it writes, so with several processes the
+directory can grow past the bound by what the others have written since.
+
+Concurrent requests for the same missing variant within a process are served
+by a single render: the first renders it while the others wait for the file.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+try:
+    # Older Pillow releases only write AVIF with this plugin, which registers
+    # the encoder when imported.
+    import pillow_avif
+except ImportError:
+    pillow_avif = None
+
+MAX_DIMENSION = 4000
+DEFAULT_QUALITY = 80
+
+"""
+Output formats by preference, with their media type and Pillow encoder.
+A format is only offered if the installed Pillow can write it.
+"""
+FORMATS = OrderedDict([
+    ('avif', ('image/avif', 'AVIF')),
+    ('webp', ('image/webp', 'WEBP')),
+    ('jpeg', ('image/jpeg', 'JPEG')),
+])
+
+
+def _can_save(encoder):
+    Image.init()
+    return encoder in Image.SAVE
+
+
+AVAILABLE_FORMATS = [name for name, (media_type, encoder) in FORMATS.items() if _can_save(encoder)]
+
+
+class Variant():
+    """The size, quality and format of a resized image."""
+
+    def __init__(self, width=None, height=None, quality=DEFAULT_QUALITY, format='jpeg'):
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.format = format
+
+    @property
+    def media_type(self):
+        return FORMATS[self.format][0]
+
+    def key(self, name):
+        """Return the cache key of this variant of the stored image `name`."""
+        parts = (name, self.width, self.height, self.quality, self.format)
+        return hashlib.sha1('\x00'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _dimension(value, name):
+    if value is None or value == '':
+        return None
+    size = int(value)
+    if not 0 < size <= MAX_DIMENSION:
+        raise ValueError('{} must be between 1 and {}'.format(name, MAX_DIMENSION))
+    return size
+
+
+def accepted_types(accept):
+    """Return the media types the `Accept` header value lists without `q=0`."""
+    accepted = set()
+    for part in accept.split(','):
+        media_type, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(media_type.strip().lower())
+    return accepted
+
+
+def negotiate_format(accept):
+    """Return the preferred format the `Accept` header value allows. JPEG is always allowed."""
+    accepted = accepted_types(accept)
+    for name in AVAILABLE_FORMATS:
+        if FORMATS[name][0] in accepted:
+            return name
+    return 'jpeg'
+
+
+def parse_variant(query_params, accept):
+    """
+    Return the `Variant` asked for by the `w`, `h` and `q` query parameters and
+    the `Accept` header. Raises ValueError on an invalid parameter.
+    """
+    quality = int(query_params.get('q') or DEFAULT_QUALITY)
+    if not 1 <= quality <= 100:
+        raise ValueError('q must be between 1 and 100')
+    return Variant(
+        width=_dimension(query_params.get('w'), 'w'),
+        height=_dimension(query_params.get('h'), 'h'),
+        quality=quality,
+        format=negotiate_format(accept),
+    )
+
+
+def render(file, variant):
+    """Return the bytes of the image in `file` scaled to fit `variant`, never enlarged."""
+    image = ImageOps.exif_transpose(Image.open(file))
+    width, height = variant.width or image.width, variant.height or image.height
+    # `thumbnail` keeps the aspect ratio and only ever shrinks.
+    image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    encoder = FORMATS[variant.format][1]
+    if encoder == 'JPEG':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    output = BytesIO()
+    image.save(output, encoder, quality=variant.quality)
+    return output.getvalue()
+
+
+class DiskLRUCache():
+    """
+    A directory of files, trimmed to `max_bytes` by deleting the least recently
+    used. The total size is counted by each instance, not across processes.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._entries = None
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        return Path(self._directory or getattr(settings, 'IMAGE_CACHE_DIR', Path(settings.BASE_DIR) / 'cache' / 'images'))
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or getattr(settings, 'IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+
+    def _load(self):
+        # Called with the lock held. Files are indexed oldest use first.
+        if self._entries is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for mtime, name, size in sorted(files))
+        self._total = sum(self._entries.values())
+
+    def get(self, key):
+        """Return the path of the file for `key` and mark it used, or None."""
+        with self._lock:
+            self._load()
+            path = self.directory / key
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                # Another process may have evicted it.
+                self._total -= self._entries.pop(key, 0)
+                return None
+            if key not in self._entries:
+                self._entries[key] = path.stat().st_size
+                self._total += self._entries[key]
+            self._entries.move_to_end(key)
+            return path
+
+    def set(self, key, content):
+        """Store `content` as the file for `key`, evicting old files to stay in bounds, and return its path."""
+        with self._lock:
+            self._load()
+            path = self.directory / key
+            # Write to a temporary file and rename it, so readers never see a partial file.
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix='.')
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(content)
+            os.replace(temporary, path)
+            self._total += len(content) - self._entries.pop(key, 0)
+            self._entries[key] = len(content)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                oldest, size = self._entries.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(self.directory / oldest)
+                except FileNotFoundError:
+                    pass
+            return path
+
+
+class SingleFlight():
+    """Runs at most one call at a time per key, sharing its result with concurrent callers."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        try:
+            call['result'] = function()
+        except Exception as error:
+            call['error'] = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['result']
+
+
+cache = DiskLRUCache()
+single_flight = SingleFlight()
+
+
+def open_variant(storage, name, variant):
+    """Return the cached `variant` of the stored image `name` opened for reading, rendering it on a miss."""
+    try:
+        return open(variant_path(storage, name, variant), 'rb')
+    except FileNotFoundError:
+        # The file was evicted between finding and opening it, so make it again.
+        return open(variant_path(storage, name, variant), 'rb')
+
+
+def variant_path(storage, name, variant):
+    """Return the path of the cached `variant` of the stored image `name`, rendering it on a miss."""
+    key = variant.key(name)
+    path = cache.get(key)
+    if path is not None:
+        return path
+
+    def render_and_store():
+        # A concurrent leader may have finished while this caller was deciding.
+        path = cache.get(key)
+        if path is not None:
+            return path
+        with storage.open(name) as file:
+            return cache.set(key, render(file, variant))
+
+    return single_flight.do(key, render_and_store)
@@ -0,0 +1,41 @@
+"""
+Request the hot API paths against the configured database, explain every query
+they send to MongoDB and fail if any of them scans the whole collection. See
+`artgallery.query_audit`, which `python manage.py test` also runs on the test
+database.
+
+Run it against a database that has been migrated and holds some records, since
+a path that names a missing record may stop before its main query:
+
+    python manage.py audit_query_plans [--verbosity 2]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from artgallery.query_audit import audit
+
+
+class Command(BaseCommand):
+    help = 'Explain the queries behind the hot API paths and fail on any collection scan.'
+
+    def handle(self, *args, **options):
+        failures = []
+        for result in audit():
+            name = result.path.name
+            if result.silent:
+                self.stdout.write(self.style.WARNING('{}: sent no query'.format(name)))
+                continue
+            plans = '; '.join(' <- '.join(stages) for command, stages in result.plans)
+            if result.failed:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR('{}: {}'.format(name, plans)))
+            elif result.scans:
+                self.stdout.write(self.style.WARNING('{}: {} (expected, {})'.format(name, plans, result.path.allow_scan)))
+            else:
+                self.stdout.write('{}: {}'.format(name, plans))
+            if options['verbosity'] > 1:
+                for command, stages in result.plans:
+                    self.stdout.write('    {}'.format(dict(command)))
+        if failures:
+            raise CommandError('Collection scans on: ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Every hot path uses an index.'))
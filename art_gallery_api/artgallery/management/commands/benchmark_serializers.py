@@ -0,0 +1,98 @@
+"""
+Compare the DRF serializers with `ValuesSerializer` on rows held in memory, so
+only serialisation is timed, and check that both give the same JSON:
+
+    python manage.py benchmark_serializers --rows 10000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from artgallery.values import ValuesSerializer
+from artists.models import Artist
+from artists.serializers import ArtistSerializer
+from artworks.models import Artwork
+from artworks.serializers import ArtworkSerializer
+from users.models import User
+from users.serializers import UserSerializer
+from videos.models import Video
+from videos.serializers import VideoSerializer
+
+SERIALIZERS = [
+    (ArtworkSerializer, Artwork),
+    (ArtistSerializer, Artist),
+    (VideoSerializer, Video),
+    (UserSerializer, User),
+]
+
+
+def sample_value(field, index, now):
+    """A plausible value for `field` in row `index`."""
+    if field.choices:
+        return field.choices[index % len(field.choices)][0]
+    if isinstance(field, models.AutoField):
+        return index + 1
+    if isinstance(field, models.FileField):
+        return '{}sample{}.png'.format(field.upload_to, index)
+    if isinstance(field, models.EmailField):
+        return 'user{}@example.com'.format(index)
+    if isinstance(field, models.CharField):
+        return ('Sample text for row {} '.format(index) * 200)[:field.max_length // 2]
+    if isinstance(field, models.DateTimeField):
+        return now
+    if isinstance(field, models.BooleanField):
+        return index % 2 == 0
+    if isinstance(field, models.FloatField):
+        return index * 0.25
+    if isinstance(field, models.IntegerField):
+        return 1900 + index % 120
+    return None
+
+
+def sample_rows(model, serializer, count):
+    """Return `count` instances of `model` and the matching `.values()` rows."""
+    now = timezone.now()
+    instances = []
+    rows = []
+    for index in range(count):
+        row = {}
+        for name in serializer.columns:
+            row[name] = sample_value(model._meta.get_field(name), index, now)
+        instances.append(model(**row))
+        rows.append(row)
+    return instances, rows
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = 'Time the DRF serializers against ValuesSerializer on in-memory rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        encoder = JSONEncoder()
+        for serializer_class, model in SERIALIZERS:
+            fast = ValuesSerializer(serializer_class)
+            instances, rows = sample_rows(model, fast, options['rows'])
+            drf_time, drf_data = best_time(lambda: serializer_class(instances, many=True).data, options['repeat'])
+            fast_time, fast_data = best_time(lambda: fast.data(rows), options['repeat'])
+            if encoder.encode(drf_data) != encoder.encode(fast_data):
+                raise CommandError('{} output differs from ValuesSerializer'.format(serializer_class.__name__))
+            self.stdout.write('{:<20} {} rows  DRF {:8.1f} ms  values {:7.1f} ms  {:5.1f}x faster, identical JSON'.format(
+                serializer_class.__name__, options['rows'], drf_time * 1000, fast_time * 1000, drf_time / fast_time
+            ))
@@ -0,0 +1,37 @@
+"""
+Write every artwork, artist or video to a file or standard output as NDJSON or
+CSV, for example for a nightly dump:
+
+    python manage.py export_catalogue artworks --output csv --file artworks.csv
+    python manage.py export_catalogue videos --modified-since 2022-10-12T00:00:00Z
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from artgallery import export
+
+
+class Command(BaseCommand):
+    help = 'Export artworks, artists or videos as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=list(export.EXPORTABLE))
+        parser.add_argument('--output', choices=list(export.EXPORT_OUTPUTS), default='ndjson')
+        parser.add_argument('--fields', help='Comma separated fields to export. Defaults to every field the API shows.')
+        parser.add_argument('--modified-since', help='Only records modified at or after this ISO 8601 date and time.')
+        parser.add_argument('--file', help='Write to this file instead of standard output.')
+
+    def handle(self, *args, **options):
+        try:
+            fields = export.parse_fields(options['name'], options['fields'])
+            modified_since = export.parse_modified_since(options['modified_since'])
+        except ValueError as error:
+            raise CommandError(error)
+        rows = export.export_rows(options['name'], fields, modified_since)
+        chunks = export.render(options['output'], rows, fields)
+        if options['file']:
+            with open(options['file'], 'wb') as file:
+                file.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
@@ -0,0 +1,39 @@
+"""
+Make the thumbnails of artworks that are still pending, such as those added by
+bulk creation or left over when the thumbnail pool was full:
+
+    python manage.py generate_thumbnails [--retry-failed] [--all]
+
+Artworks are processed one at a time in this process, not by the pool.
+"""
+
+from django.core.management.base import BaseCommand
+
+from artgallery import thumbnails
+from artworks.models import Artwork
+
+
+class Command(BaseCommand):
+    help = 'Make the thumbnails of artworks whose thumbnails are pending.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry artworks whose thumbnails failed.')
+        parser.add_argument('--all', action='store_true', help='Remake the thumbnails of every artwork.')
+
+    def handle(self, *args, **options):
+        artworks = Artwork.objects.all()
+        if not options['all']:
+            statuses = [thumbnails.PENDING] + ([thumbnails.FAILED] if options['retry_failed'] else [])
+            artworks = artworks.filter(thumbnail_status__in=statuses)
+
+        counts = {thumbnails.READY: 0, thumbnails.FAILED: 0}
+        for pk in artworks.values_list('id', flat=True).iterator():
+            result = thumbnails.generate(Artwork, pk)
+            if result is not None:
+                counts[result] += 1
+                if result == thumbnails.FAILED:
+                    self.stdout.write(self.style.WARNING('Could not make thumbnails for artwork {}'.format(pk)))
+
+        self.stdout.write(self.style.SUCCESS('Made thumbnails for {} artworks, {} failed.'.format(
+            counts[thumbnails.READY], counts[thumbnails.FAILED]
+        )))
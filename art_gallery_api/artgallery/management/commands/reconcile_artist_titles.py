@@ -0,0 +1,65 @@
+"""
+Find and repair artworks whose `artist_title` no longer matches their artist.
+
+One aggregation over the artworks groups them by `artist_id` and
+`artist_title`, which is compared with the titles of the artists, and each
+stale group is rewritten in batches:
+
+    python manage.py reconcile_artist_titles [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+
+from artgallery.mongo import collection
+from artists.models import Artist
+from artists.propagation import update_copies
+from artworks.models import Artwork
+
+
+def drifted_artists(titles):
+    """
+    Yield `(artist_id, stale_title, count)` for each group of artworks whose
+    `artist_title` differs from `titles[artist_id]`, and `(artist_id, None,
+    count)` for artworks whose artist does not exist.
+    """
+    pipeline = [
+        {'$group': {'_id': {'artist_id': '$artist_id', 'artist_title': '$artist_title'}, 'count': {'$sum': 1}}},
+    ]
+    for group in collection(Artwork).aggregate(pipeline, allowDiskUse=True):
+        artist_id, artist_title = group['_id'].get('artist_id'), group['_id'].get('artist_title')
+        if artist_id not in titles:
+            yield artist_id, None, group['count']
+        elif artist_title != titles[artist_id]:
+            yield artist_id, artist_title, group['count']
+
+
+class Command(BaseCommand):
+    help = 'Repair artworks whose artist_title differs from the title of their artist.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it.')
+
+    def handle(self, *args, **options):
+        titles = dict(Artist.objects.values_list('id', 'title'))
+        repaired = set()
+        stale = orphans = 0
+        for artist_id, stale_title, count in drifted_artists(titles):
+            if stale_title is None:
+                orphans += count
+                self.stdout.write(self.style.WARNING('{} artworks name artist {}, which does not exist'.format(count, artist_id)))
+                continue
+            stale += count
+            self.stdout.write('{} artworks of artist {} have the title {!r} instead of {!r}'.format(
+                count, artist_id, stale_title, titles[artist_id]
+            ))
+            # Every stale group of an artist is repaired by the first update.
+            if not options['dry_run'] and artist_id not in repaired:
+                update_copies(artist_id, {'title': titles[artist_id]})
+                repaired.add(artist_id)
+
+        if options['dry_run']:
+            self.stdout.write('{} artworks have a stale artist_title.'.format(stale))
+        else:
+            self.stdout.write(self.style.SUCCESS('Repaired {} artworks of {} artists.'.format(stale, len(repaired))))
+        if orphans:
+            self.stdout.write(self.style.WARNING('{} artworks name an artist that does not exist.'.format(orphans)))
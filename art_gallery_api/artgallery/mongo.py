@@ -0,0 +1,15 @@
+"""
+Helpers for reaching the MongoDB collections behind the Djongo models.
+
+Djongo translates the Django ORM into MongoDB queries, but some operations
+(collection statistics, aggregation pipelines, explain plans) are only
+available on the underlying pymongo collection.
+"""
+
+from django.db import connections, router
+
+
+def collection(model, using=None):
+    """Return the pymongo collection that stores ``model``."""
+    using = using or router.db_for_read(model)
+    return connections[using].cursor().db_conn[model._meta.db_table]
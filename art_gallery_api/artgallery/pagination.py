@@ -0,0 +1,155 @@
+"""
+Keyset (cursor) pagination shared by the list views.
+
+Pages are ordered by ``(last_modified, id)`` and each cursor stores the position
+of the row at the edge of the page it came from. The next page is then fetched
+with a range query on that position rather than a skip/offset, so page N costs
+the same as page 1 against the ``(last_modified, id)`` index.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from artgallery.mongo import collection
+
+
+def make_cursor(value, pk, reverse=False):
+    """Return the cursor for the position `(value, pk)` in `(last_modified, id)` order."""
+    token = json.dumps({'v': value.isoformat(), 'i': pk, 'r': int(reverse)})
+    return urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates a queryset by ``(last_modified, id)`` using opaque cursors.
+
+    * `?page_size=` sets the number of results, up to `max_page_size`.
+    * `?cursor=` is taken from the `next` or `previous` link of an earlier page.
+    * `?total=true` adds an `estimated_total` to the response.
+    """
+
+    ordering = ('last_modified', 'id')
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.estimated_total = None
+        if request.query_params.get(self.total_query_param) in ('true', '1'):
+            self.estimated_total = self.get_estimated_total(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        field, tiebreak = self.ordering
+        if reverse:
+            queryset = queryset.order_by('-' + field, '-' + tiebreak)
+        else:
+            queryset = queryset.order_by(field, tiebreak)
+
+        if position is not None:
+            lookup = '__lt' if reverse else '__gt'
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{field + lookup: value}) | Q(**{field: value, tiebreak + lookup: pk})
+            )
+
+        # Fetch one extra row to find out whether there is another page after this one.
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_estimated_total(self, queryset):
+        """
+        Unfiltered querysets are counted from the collection metadata, which
+        costs the same however large the collection is. Filtered querysets
+        fall back to an exact count over the matching documents.
+        """
+        if queryset.query.has_filters():
+            return queryset.count()
+        return collection(queryset.model).estimated_document_count()
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[name] for name in self.ordering]
+        return [getattr(item, name) for name in self.ordering]
+
+    def encode_cursor(self, item, reverse):
+        value, pk = self.get_position(item)
+        return replace_query_param(self.base_url, self.cursor_query_param, make_cursor(value, pk, reverse))
+
+    def decode_cursor(self, request):
+        """
+        Return the `((last_modified, id), reverse)` position held by the cursor,
+        or `(None, False)` for the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            token = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            value = parse_datetime(token['v'])
+            pk = int(token['i'])
+            reverse = bool(int(token.get('r', 0)))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.estimated_total is not None:
+            response['estimated_total'] = self.estimated_total
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'estimated_total': {'type': 'integer'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,230 @@
+"""
+An audit of the query plans behind the hot API paths.
+
+Each hot path is requested through its view while a pymongo command listener
+records every `find`, `aggregate` and `count` sent to MongoDB. That covers the
+queries djongo generates from the views' querysets as well as those the raw
+pymongo helpers run, such as text search and facet counts. Each recorded
+command is then run through `explain`, and a path fails if any of the winning
+plans scans the whole collection.
+
+`artgallery.tests` runs the audit against the migrated test database, so
+`python manage.py test` fails on a collection scan. `manage.py
+audit_query_plans` runs it against the configured database.
+
+Sample ids, titles, places and dates come from the first record of each type,
+so the same paths can be audited on seeded test data or on a live catalogue.
+"""
+
+from base64 import b64encode
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from bson import SON
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from pymongo import monitoring
+from rest_framework.test import APIClient
+
+from artgallery.cache import FeedCache
+from artgallery.pagination import make_cursor
+from artists.models import Artist
+from artworks.models import Artwork
+from users.models import User
+from videos.models import Video
+
+AUDITED_COMMANDS = ('find', 'aggregate', 'count', 'distinct')
+
+"""
+Why some paths may scan: an unanchored, case-insensitive match cannot use a
+B-tree index, and counting every value of every facet reads every document.
+"""
+SUBSTRING_SCAN = 'title matches any substring, which no index can answer'
+FACET_SCAN = 'unfiltered facet counts cover every document'
+
+
+class HotPath():
+    """
+    A request to audit. `allow_scan` gives the reason a collection scan is
+    expected on this path, which is then reported but not failed.
+    """
+
+    def __init__(self, name, path, allow_scan=None, headers=None):
+        self.name = name
+        self.path = path
+        self.allow_scan = allow_scan
+        self.headers = headers or {}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keeps the read commands sent while `commands` is a list."""
+
+    def __init__(self):
+        self.commands = None
+
+    def started(self, event):
+        if self.commands is not None and event.command_name in AUDITED_COMMANDS:
+            # The session and the `$`-prefixed fields belong to the wire
+            # protocol, not the query, and `explain` refuses them.
+            self.commands.append(SON(
+                (key, value) for key, value in event.command.items() if key != 'lsid' and not key.startswith('$')
+            ))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+recorder = CommandRecorder()
+monitoring.register(recorder)
+
+
+@contextmanager
+def recording(using=DEFAULT_DB_ALIAS):
+    """Record the read commands sent inside the block, yielding the list they are added to."""
+    # A client only notifies the listeners registered before it was made, so
+    # reconnect in case the connection predates this module.
+    connections[using].close()
+    recorder.commands = []
+    try:
+        yield recorder.commands
+    finally:
+        recorder.commands = None
+
+
+def _sample(model, fields, defaults):
+    return model.objects.order_by('id').values(*fields).first() or defaults
+
+
+def hot_paths():
+    """Return the `HotPath`s to audit, filled in from the first record of each type."""
+    now = timezone.now()
+    artwork = _sample(Artwork, ('id', 'title', 'latitude', 'longitude', 'date_start', 'artist_id', 'last_modified'), {
+        'id': 1, 'title': 'untitled', 'latitude': -33.87, 'longitude': 151.21, 'date_start': 1900, 'artist_id': 1, 'last_modified': now,
+    })
+    artist = _sample(Artist, ('id', 'title'), {'id': 1, 'title': 'untitled'})
+    video = _sample(Video, ('id', 'title'), {'id': 1, 'title': 'untitled'})
+    user = _sample(User, ('id', 'email'), {'id': 1, 'email': 'someone@example.com'})
+
+    def word(record):
+        return quote((record['title'].split() or ['untitled'])[0])
+
+    latitude, longitude = artwork['latitude'], artwork['longitude']
+    bbox = '{},{},{},{}'.format(
+        max(longitude - 0.5, -180), max(latitude - 0.5, -90), min(longitude + 0.5, 180), min(latitude + 0.5, 90)
+    )
+    years = '{},{}'.format(artwork['date_start'] - 10, artwork['date_start'] + 10)
+    since = quote(artwork['last_modified'].isoformat())
+    return [
+        HotPath('ListArtworks', '/api/artworks'),
+        HotPath('ListArtworks next page', '/api/artworks?cursor=' + make_cursor(artwork['last_modified'], artwork['id'])),
+        HotPath('ListArtworks by title', '/api/artworks?title=' + word(artwork), allow_scan=SUBSTRING_SCAN),
+        HotPath('ListArtworks in a bounding box', '/api/artworks?bbox=' + bbox),
+        HotPath('ListArtworks overlapping dates', '/api/artworks?overlaps=' + years),
+        HotPath('ListArtworks within dates', '/api/artworks?within=' + years),
+        HotPath('ListArtworks nearest', '/api/artworks?near={},{}&radius=50&k=5'.format(latitude, longitude)),
+        HotPath('ListArtworks streamed', '/api/artworks?stream=true'),
+        HotPath('ListArtworkDetail', '/api/artworks/{}'.format(artwork['id'])),
+        HotPath('ListDisplayedArtworks', '/api/artworks/displayed'),
+        HotPath('ArtworkFacets', '/api/artworks/facets', allow_scan=FACET_SCAN),
+        HotPath('ArtworkFacets on display', '/api/artworks/facets?on_display=true'),
+        HotPath('ListArtists', '/api/artists'),
+        HotPath('ListArtists by title', '/api/artists?title=' + word(artist), allow_scan=SUBSTRING_SCAN),
+        HotPath('ListArtistDetail', '/api/artists/{}'.format(artist['id'])),
+        HotPath('ListArtistArtworks', '/api/artists/{}/artworks'.format(artwork['artist_id'])),
+        HotPath('ListVideos', '/api/videos'),
+        HotPath('ListVideos by title', '/api/videos?title=' + word(video), allow_scan=SUBSTRING_SCAN),
+        HotPath('ListVideoDetail', '/api/videos/{}'.format(video['id'])),
+        HotPath('ListPublishedVideos', '/api/videos/published'),
+        HotPath('VideoFacets', '/api/videos/facets', allow_scan=FACET_SCAN),
+        HotPath('VideoFacets published', '/api/videos/facets?published=true'),
+        HotPath('ListUsers', '/api/users'),
+        HotPath('ListUserDetail', '/api/users/{}'.format(user['id'])),
+        # A wrong password is never cached, so the user is looked up by email.
+        HotPath('Basic authentication', '/api/users/{}'.format(user['id']), headers={
+            'HTTP_AUTHORIZATION': 'Basic ' + b64encode('{}:not-the-password'.format(user['email']).encode()).decode(),
+        }),
+        HotPath('Search', '/api/search?q=' + word(artwork)),
+        HotPath('Export artworks', '/api/export/artworks'),
+        HotPath('Export artworks modified since', '/api/export/artworks?modified_since=' + since),
+        HotPath('Export artists', '/api/export/artists'),
+        HotPath('Export videos', '/api/export/videos'),
+    ]
+
+
+def plan_stages(plan):
+    """Yield the name of every stage in an explained query plan."""
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        if isinstance(plan.get(key), dict):
+            yield from plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        yield from plan_stages(child)
+
+
+def winning_plans(explained):
+    """Yield every winning plan in an `explain` result, including those of aggregation stages."""
+    if isinstance(explained, dict):
+        for key, value in explained.items():
+            if key == 'winningPlan':
+                yield value
+            else:
+                yield from winning_plans(value)
+    elif isinstance(explained, list):
+        for item in explained:
+            yield from winning_plans(item)
+
+
+def explain(command, using=DEFAULT_DB_ALIAS):
+    database = connections[using].cursor().db_conn
+    return database.command('explain', command, verbosity='queryPlanner')
+
+
+class AuditResult():
+    """The commands a `HotPath` sent, each with the stages of its winning plans."""
+
+    def __init__(self, path, plans):
+        self.path = path
+        self.plans = plans
+
+    @property
+    def silent(self):
+        """Whether the path sent no query, as when the records it names do not exist."""
+        return not self.plans
+
+    @property
+    def scans(self):
+        return any('COLLSCAN' in stages for command, stages in self.plans)
+
+    @property
+    def failed(self):
+        return self.scans and self.path.allow_scan is None
+
+
+def audit(paths=None, using=DEFAULT_DB_ALIAS):
+    """Request each of `paths`, or the `hot_paths`, and return an `AuditResult` for each."""
+    client = APIClient()
+    # Every view is open to managers. Paths with headers of their own carry
+    # their own credentials instead.
+    client.force_authenticate(user=User(role=User.MANAGER))
+    anonymous = APIClient()
+    results = []
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for path in paths or hot_paths():
+            # The cached feeds would otherwise be answered without a query.
+            FeedCache(Artwork).invalidate()
+            FeedCache(Video).invalidate()
+            with recording(using) as commands:
+                response = (anonymous if path.headers else client).get(path.path, **path.headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            plans = []
+            for command in commands:
+                stages = [list(plan_stages(plan)) for plan in winning_plans(explain(command, using))]
+                plans.append((command, [stage for each in stages for stage in each]))
+            results.append(AuditResult(path, plans))
+    return results
@@ -0,0 +1,146 @@
+"""
+Byte range responses for stored media files.
+
+A `Range: bytes=...` request gets a 206 holding only the bytes asked for. The
+file is opened at the first of them, so nothing before it is read, and the
+response hands the open file to the server: servers with a `wsgi.file_wrapper`
+that uses `sendfile` (gunicorn, for one) copy the range from the file to the
+socket without it passing through Python. Elsewhere it is read in blocks.
+
+`If-Range` is honoured, so a client resuming a download only gets a range if
+the file is still the one it started with, and the whole file otherwise.
+Requests for several ranges at once are answered with the whole file.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from artgallery.conditional import Validators
+
+_range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Return the `(start, end)` bytes, inclusive, that a `Range` header value asks
+    for in a file of `size` bytes, or None to send the whole file. Raises
+    `RangeNotSatisfiable` if the range lies past the end of the file.
+    """
+    match = _range_re.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable()
+    if not first:
+        # A suffix range asks for the last `last` bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def file_validators(name, size, last_modified):
+    """
+    Validators for a stored file. The ETag is strong, as `If-Range` requires,
+    since it changes whenever the file's name, size or record does.
+    """
+    digest = hashlib.sha1('\x00'.join((name, str(size), last_modified.isoformat())).encode())
+    return Validators(quote_etag(digest.hexdigest()), last_modified)
+
+
+def if_range_matches(request, validators):
+    """Whether a `Range` may be honoured given the request's `If-Range`, if any."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == validators.etag
+    return parse_http_date_safe(if_range) == validators.timestamp
+
+
+class RangeFile():
+    """
+    A file opened at `start` that reads no further than `length` bytes on, for
+    `FileResponse`. `fileno` is passed through so servers can `sendfile` it.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        self.name = getattr(file, 'name', '')
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def seekable(self):
+        # Stops `FileResponse` working out a length from the end of the file.
+        return False
+
+    def close(self):
+        self.file.close()
+
+
+def range_response(request, storage, name, last_modified):
+    """
+    Return a response with the stored file `name`, or the range of it asked
+    for, a 304 if the client's copy is current, or a 416 for a range past its
+    end.
+    """
+    size = storage.size(name)
+    validators = file_validators(name, size, last_modified)
+    not_modified = validators.not_modified(request)
+    if not_modified is not None:
+        return not_modified
+
+    byte_range = None
+    if request.META.get('HTTP_RANGE') and if_range_matches(request, validators):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(size)
+            response['Accept-Ranges'] = 'bytes'
+            return validators.apply(response)
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    response = FileResponse(
+        RangeFile(storage.open(name), start, length),
+        content_type=content_type,
+        filename=os.path.basename(name),
+        status=206 if byte_range else 200,
+    )
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, size)
+    return validators.apply(response)
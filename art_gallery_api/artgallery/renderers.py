@@ -0,0 +1,108 @@
+"""
+Renderers and parsers for the API.
+
+* `FastJSONRenderer` encodes with orjson when it is installed, and otherwise
+  falls back to DRF's `JSONRenderer`. Its output is byte for byte what
+  `JSONRenderer` produces with the default settings.
+* `MessagePackRenderer` and `MessagePackParser` speak `application/msgpack`
+  for the native kiosk clients. They are only enabled in the settings when the
+  msgpack package is installed.
+"""
+
+import re
+
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+"""
+orjson and the standard library agree on every value except floats below 1e-4
+or from 1e16 up in magnitude, which they spell differently (`1e-05` against
+`0.00001`, `1e+16` against `1e16`). Output that may hold such a number is
+encoded again with the standard library. The pattern can also match inside
+strings, which only costs an unneeded fallback.
+"""
+FLOAT_SPELLING = re.compile(rb'(?<![\w.])-?\d+(?:\.\d+)?[eE]|(?<![\w.])-?0\.0000')
+
+_encoder = JSONEncoder()
+_stdlib_encoder = JSONEncoder(
+    ensure_ascii=not api_settings.UNICODE_JSON,
+    allow_nan=not api_settings.STRICT_JSON,
+    separators=(',', ':') if api_settings.COMPACT_JSON else (', ', ': '),
+)
+
+
+def _escape_separators(content):
+    # Like JSONRenderer, escape the line and paragraph separators that are
+    # valid in JSON strings but end a line in JavaScript.
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def dumps(data):
+    """
+    Return `data` encoded as compact JSON bytes, exactly as `JSONRenderer`
+    would with the default settings.
+    """
+    if orjson is not None and api_settings.COMPACT_JSON and api_settings.UNICODE_JSON:
+        try:
+            content = orjson.dumps(
+                data,
+                default=_encoder.default,
+                # Dates and times go through DRF's encoder so they keep its format.
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            content = None
+        if content is not None and not FLOAT_SPELLING.search(content):
+            return _escape_separators(content)
+    return _escape_separators(_stdlib_encoder.encode(data).encode('utf-8'))
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """`JSONRenderer` backed by `dumps` for compact output."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or self.encoder_class is not JSONEncoder:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renders the same data as the JSON renderers, packed as MessagePack."""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parses MessagePack request bodies."""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as error:
+            raise ParseError('MessagePack parse error - %s' % str(error))
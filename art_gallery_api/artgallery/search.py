@@ -0,0 +1,57 @@
+"""
+Full-text search over artworks, artists and videos.
+
+Each searchable collection carries a MongoDB text index, an inverted index that
+MongoDB updates as part of every insert, update and delete, so it never needs
+rebuilding. The indexes are created by the migrations of each app, which fix
+the fields and their weights, and queries are ranked by MongoDB's text score.
+Changing the weights takes a new migration that drops and recreates the index.
+"""
+
+from pymongo import TEXT
+
+from artgallery.mongo import collection
+
+SEARCH_INDEX_NAME = 'search_idx'
+
+
+def create_search_index(model, weights, using=None):
+    """Create a text index for `model` over the fields of `weights`, by weight, if it does not exist yet."""
+    collection(model, using).create_index(
+        [(field, TEXT) for field in weights],
+        weights=weights,
+        name=SEARCH_INDEX_NAME,
+        default_language='english'
+    )
+
+
+def drop_search_index(model, using=None):
+    collection(model, using).drop_index(SEARCH_INDEX_NAME)
+
+
+def search(model, query, limit=20):
+    """
+    Return up to `limit` `(id, score)` pairs for documents of `model` that match
+    `query`, best match first.
+    """
+    cursor = collection(model).find(
+        {'$text': {'$search': query}},
+        {'_id': 0, 'id': 1, 'score': {'$meta': 'textScore'}}
+    ).sort([('score', {'$meta': 'textScore'})]).limit(limit)
+    return [(document['id'], document['score']) for document in cursor]
+
+
+def search_instances(model, query, limit=20):
+    """
+    Return the matching instances of `model` in rank order, each with its text
+    score set as `search_score`.
+    """
+    ranked = search(model, query, limit)
+    instances = model.objects.in_bulk([pk for pk, score in ranked])
+    results = []
+    for pk, score in ranked:
+        instance = instances.get(pk)
+        if instance is not None:
+            instance.search_score = score
+            results.append(instance)
+    return results
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 import environ
 
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_swagger',
     'drf_spectacular',
+    'artgallery',
     'artists',
     'artworks',
     'users',
@@ -54,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'artgallery.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.admindocs.middleware.XViewMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +66,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Responses smaller than this many bytes are sent uncompressed, since below it
+# the saving is lost in the headers and the time spent compressing.
+COMPRESSION_MIN_SIZE = 1024
+
 ROOT_URLCONF = 'artgallery.urls'
 
 TEMPLATES = [
@@ -121,6 +128,57 @@ PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.ScryptPasswordHasher',
 ]
 
+# Successful basic authentication checks are cached in-process so the Argon2
+# hasher above only runs on a cache miss.
+CREDENTIAL_CACHE_MAX_ENTRIES = 1024
+CREDENTIAL_CACHE_TTL = 300
+
+# Lifetime in seconds of the bearer tokens issued by /api/token.
+SIGNED_TOKEN_TTL = 900
+
+# Rendered responses of the displayed artworks and published videos feeds are
+# kept in the FEED_CACHE_ALIAS cache until an artwork or video changes. The
+# local memory cache is per process, so deployments running several processes
+# should point the alias at a shared backend such as Redis or Memcached;
+# otherwise FEED_CACHE_TIMEOUT bounds how long another process can serve a
+# stale feed.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feeds': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feeds',
+    },
+}
+FEED_CACHE_ALIAS = 'feeds'
+FEED_CACHE_TIMEOUT = 300
+
+# Title changes of an artist are copied onto its artworks by a background
+# thread, rewriting at most this many artworks per write.
+ARTIST_TITLE_BATCH_SIZE = 500
+
+# Thumbnails are made from each uploaded artwork image at these widths by a
+# pool of THUMBNAIL_WORKERS threads, with up to THUMBNAIL_QUEUE_SIZE more jobs
+# waiting. The THUMBNAIL_DEFAULT_WIDTH copy is also used as `thumbnail`.
+THUMBNAIL_WIDTHS = (160, 320, 640)
+THUMBNAIL_DEFAULT_WIDTH = 320
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_QUEUE_SIZE = 64
+
+# Resized artwork images are cached in this directory, which is kept below
+# IMAGE_CACHE_MAX_BYTES by deleting the least recently used.
+IMAGE_CACHE_DIR = BASE_DIR / 'cache' / 'images'
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Resumable uploads are assembled in UPLOAD_DIR, which must be on the same
+# filesystem as the media files so finished uploads can be moved into place.
+# Sessions untouched for UPLOAD_SESSION_TTL seconds are deleted.
+UPLOAD_DIR = BASE_DIR / 'data' / 'uploads'
+UPLOAD_MAX_BYTES = 8 * 1024 * 1024 * 1024
+UPLOAD_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.1/topics/i18n/
 
@@ -163,7 +221,27 @@ AUTHENTICATION_BACKENDS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework.authentication.SessionAuthentication',
+        'artgallery.authentication.CachedBasicAuthentication',
+        'artgallery.authentication.SignedTokenAuthentication',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'artgallery.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+
+# MessagePack is offered to clients that send `Accept: application/msgpack`
+# whenever the optional msgpack package is installed.
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('artgallery.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('artgallery.renderers.MessagePackParser')
@@ -0,0 +1,52 @@
+"""
+Streaming JSON responses for the list views.
+
+`?stream=true` on a list view returns every matching record in one response,
+rendered row by row while the queryset is walked in chunks. Only one chunk of
+rows and one serialized row are held at a time, so memory use stays
+flat however many records match. The stream is always JSON, so a request that
+negotiated another media type, such as MessagePack, gets the usual page instead.
+"""
+
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.renderers import JSONRenderer
+
+from artgallery.pagination import KeysetPagination
+from artgallery.renderers import dumps
+from artgallery.values import values_serializer
+
+STREAM_QUERY_PARAM = 'stream'
+STREAM_CHUNK_SIZE = 500
+
+stream_parameter = OpenApiParameter(
+    STREAM_QUERY_PARAM, bool,
+    description='Set to true to stream every matching record as JSON {"results": [...]} instead of returning a page. Ignored for other media types.'
+)
+
+
+def wants_stream(request):
+    """Whether `request` asks for a stream and negotiated JSON, the only format it is written in."""
+    return (
+        request.query_params.get(STREAM_QUERY_PARAM) in ('true', '1')
+        and isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
+    )
+
+
+def stream_json(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE, fields=None):
+    """
+    Return a `StreamingHttpResponse` of `{"results": [...]}` holding every record
+    of `queryset` in pagination order, limited to `fields` if given.
+    """
+    serializer = values_serializer(serializer_class, fields)
+    rows = serializer.values(queryset.order_by(*KeysetPagination.ordering))
+
+    def render():
+        yield b'{"results":['
+        separator = b''
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield separator + dumps(serializer.to_representation(row))
+            separator = b','
+        yield b']}'
+
+    return StreamingHttpResponse(render(), content_type='application/json')
@@ -0,0 +1,323 @@
+import gzip
+import json
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from artgallery import export, geo
+from artgallery.authentication import token_ttl
+from artgallery.bulk import StoredFileField, is_stored_under
+from artgallery.compression import CompressionMiddleware, choose_coding, is_compressible
+from artgallery.query_audit import audit
+from artgallery.ranges import RangeNotSatisfiable, file_validators, if_range_matches, parse_range
+from artgallery.renderers import FastJSONRenderer, MessagePackRenderer
+from artgallery.streaming import wants_stream
+from artists.models import Artist
+from artworks.models import Artwork
+from users.models import User
+from videos.models import Video
+
+
+class QueryPlanAuditTests(TransactionTestCase):
+    """
+    Fails the test run if a hot API path scans a whole collection, see
+    `artgallery.query_audit`. The records give every path something to query.
+    """
+
+    def setUp(self):
+        artist = Artist.objects.create(title='Vincent Namatjira', sort_title='Namatjira, Vincent', birth_date=1983)
+        for title, on_display in (('Sunset over Sydney', True), ('Sunrise over Sydney', False)):
+            Artwork.objects.create(
+                title=title, image='data/images/sample.jpg', date_start=1905, date_end=1910,
+                place_of_origin='Sydney', dimensions='frame 190 x 190cm', medium_display='oil on linen',
+                latitude=-33.87, longitude=151.21, department='Australian art',
+                artist_id=artist.pk, artist_title=artist.title, on_display=on_display,
+            )
+        Video.objects.create(
+            title='Sydney at night', video='data/videos/sample.mp4', thumbnail='data/videos/thumbnails/sample.jpg',
+            production_date=2014, place_of_origin='Sydney', length='3:00', creator='A filmmaker', published=True,
+        )
+        User.objects.create_user('manager@example.com', 'Alice', 'Allison', User.MANAGER, 'a-password', '')
+
+    def test_hot_paths_use_indexes(self):
+        results = audit()
+        self.assertEqual([result.path.name for result in results if result.silent], [])
+        self.assertEqual([result.path.name for result in results if result.failed], [])
+
+
+class StoredFileFieldTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name, base_url='/media/')
+        self.storage.save('data/videos/clip.mp4', ContentFile(b'video'))
+        self.storage.save('artgallery/settings.py', ContentFile(b'SECRET_KEY = ""'))
+        self.field = StoredFileField(self.storage, 'data/videos/')
+
+    def test_accepts_names_and_urls_under_upload_to(self):
+        self.assertEqual(self.field.to_internal_value('data/videos/clip.mp4'), 'data/videos/clip.mp4')
+        self.assertEqual(self.field.to_internal_value('/media/data/videos/clip.mp4'), 'data/videos/clip.mp4')
+
+    def test_rejects_files_outside_upload_to(self):
+        for name in ('artgallery/settings.py', 'data/videos/../../artgallery/settings.py', '../etc/passwd', '/etc/passwd'):
+            with self.subTest(name=name), self.assertRaises(serializers.ValidationError):
+                self.field.to_internal_value(name)
+
+    def test_rejects_missing_files(self):
+        with self.assertRaises(serializers.ValidationError):
+            self.field.to_internal_value('data/videos/other.mp4')
+
+    def test_is_stored_under(self):
+        self.assertTrue(is_stored_under('data/videos/clip.mp4', 'data/videos/'))
+        self.assertFalse(is_stored_under('data/videos/./clip.mp4', 'data/videos/'))
+        self.assertFalse(is_stored_under('data/videos/..\\clip.mp4', 'data/videos/'))
+        self.assertFalse(is_stored_under('data/videos-old/clip.mp4', 'data/videos/'))
+        self.assertFalse(is_stored_under('data/videos/clip.mp4', ''))
+
+
+class ExportTests(SimpleTestCase):
+
+    def test_files_and_thumbnails_are_exported_as_urls(self):
+        storage = Artwork._meta.get_field('thumbnail').storage
+        row = {
+            'id': 1,
+            'image': 'data/images/sunset.jpg',
+            'thumbnails': json.dumps({'160': 'data/thumbnails/1/160.jpg'}),
+            'last_modified': timezone.now(),
+        }
+        with mock.patch('artgallery.export.Artwork.objects') as objects:
+            objects.order_by.return_value.values.return_value.iterator.return_value = [row]
+            rows = list(export.export_rows('artworks', ['id', 'image', 'thumbnails']))
+        self.assertEqual(rows, [{
+            'id': 1,
+            'image': storage.url('data/images/sunset.jpg'),
+            'thumbnails': {'160': storage.url('data/thumbnails/1/160.jpg')},
+        }])
+        csv = b''.join(export.render('csv', rows, ['id', 'image', 'thumbnails'])).decode()
+        self.assertIn(json.dumps({'160': storage.url('data/thumbnails/1/160.jpg')}, separators=(',', ':')).replace('"', '""'), csv)
+
+
+class WantsStreamTests(SimpleTestCase):
+
+    def request(self, query, renderer):
+        request = Request(APIRequestFactory().get('/api/artworks' + query))
+        request.accepted_renderer = renderer
+        return request
+
+    def test_streams_json_when_asked(self):
+        self.assertTrue(wants_stream(self.request('?stream=true', FastJSONRenderer())))
+        self.assertFalse(wants_stream(self.request('', FastJSONRenderer())))
+
+    def test_other_media_types_get_a_page(self):
+        self.assertFalse(wants_stream(self.request('?stream=true', MessagePackRenderer())))
+
+
+class TokenTTLTests(SimpleTestCase):
+
+    @override_settings(SIGNED_TOKEN_TTL=60)
+    def test_reads_the_setting(self):
+        self.assertEqual(token_ttl(), 60)
+
+    def test_defaults_without_the_setting(self):
+        with self.settings():
+            del settings.SIGNED_TOKEN_TTL
+            self.assertEqual(token_ttl(), 900)
+
+
+class GeoTests(SimpleTestCase):
+
+    def assertCovers(self, prefixes, latitude, longitude):
+        geohash = geo.encode(latitude, longitude)
+        self.assertTrue(any(geohash.startswith(prefix) for prefix in prefixes), (latitude, longitude))
+
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(-90.0, -180.0, 4), '0000')
+        self.assertEqual(geo.encode(90.0, 180.0, 4), 'zzzz')
+
+    def test_cover_uses_the_finest_precision_within_the_limit(self):
+        small = geo.cover(-33.9, 151.2, -33.8, 151.3)
+        large = geo.cover(-40.0, 140.0, -10.0, 155.0)
+        self.assertLessEqual(len(small), geo.MAX_COVER_CELLS)
+        self.assertLessEqual(len(large), geo.MAX_COVER_CELLS)
+        self.assertGreater(len(next(iter(small))), len(next(iter(large))))
+        for prefixes in (small, large):
+            self.assertEqual(len({len(prefix) for prefix in prefixes}), 1)
+        self.assertCovers(small, -33.87, 151.21)
+        # Precision 1 is the coarsest, even if the box needs more cells than allowed.
+        self.assertEqual(len(geo.cover(-90.0, -180.0, 90.0, 180.0, max_cells=1)), 32)
+
+    def test_cover_splits_boxes_across_the_antimeridian(self):
+        prefixes = geo.cover(-10.0, 170.0, 10.0, -170.0)
+        self.assertLessEqual(len(prefixes), geo.MAX_COVER_CELLS)
+        for longitude in (170.0, 179.9, 180.0, -180.0, -179.9, -170.0):
+            self.assertCovers(prefixes, 0.0, longitude)
+        self.assertFalse(any(geo.encode(0.0, 0.0).startswith(prefix) for prefix in prefixes))
+
+    def test_cover_reaches_the_poles(self):
+        for latitude, prefixes in ((90.0, geo.cover(80.0, -180.0, 90.0, 180.0)), (-90.0, geo.cover(-90.0, -180.0, -80.0, 180.0))):
+            for longitude in (-180.0, 0.0, 180.0):
+                self.assertCovers(prefixes, latitude, longitude)
+
+    def test_bounding_box(self):
+        min_lat, min_lon, max_lat, max_lon = geo.bounding_box(-33.87, 151.21, 10)
+        self.assertLess(min_lat, -33.87)
+        self.assertGreater(max_lat, -33.87)
+        self.assertLess(min_lon, 151.21)
+        self.assertGreater(max_lon, 151.21)
+        self.assertAlmostEqual(geo.distance_km(-33.87, 151.21, max_lat, 151.21), 10)
+
+    def test_bounding_box_wraps_across_the_antimeridian(self):
+        min_lat, min_lon, max_lat, max_lon = geo.bounding_box(0.0, 179.9, 50)
+        self.assertGreater(min_lon, max_lon)
+        self.assertGreater(min_lon, 179.0)
+        self.assertLess(max_lon, -179.0)
+
+    def test_bounding_box_around_a_pole_spans_every_longitude(self):
+        self.assertEqual(geo.bounding_box(89.9, 10.0, 50)[1:], (-180.0, 90.0, 180.0))
+        min_lat, min_lon, max_lat, max_lon = geo.bounding_box(-89.9, 10.0, 50)
+        self.assertEqual((min_lat, min_lon, max_lon), (-90.0, -180.0, 180.0))
+        self.assertLess(max_lat, -89.0)
+
+
+class CompressionTests(SimpleTestCase):
+    # Only the names and their order matter to `choose_coding`.
+    codings = {'br': None, 'zstd': None, 'gzip': None}
+
+    def test_choose_coding_follows_q_values(self):
+        self.assertEqual(choose_coding('gzip, br', self.codings), 'br')
+        self.assertEqual(choose_coding('gzip;q=1.0, br;q=0.5', self.codings), 'gzip')
+        self.assertEqual(choose_coding('GZIP ; q = 0.8', self.codings), 'gzip')
+        self.assertEqual(choose_coding('br', {'gzip': None}), None)
+
+    def test_choose_coding_refuses_q_zero(self):
+        self.assertEqual(choose_coding('br;q=0, gzip', self.codings), 'gzip')
+        self.assertIsNone(choose_coding('gzip;q=0', self.codings))
+        self.assertIsNone(choose_coding('*;q=0', self.codings))
+
+    def test_choose_coding_with_a_wildcard(self):
+        self.assertEqual(choose_coding('*', self.codings), 'br')
+        self.assertEqual(choose_coding('*, br;q=0', self.codings), 'zstd')
+        self.assertEqual(choose_coding('gzip;q=0.5, *;q=0.1', self.codings), 'gzip')
+
+    def test_choose_coding_ignores_identity_and_invalid_entries(self):
+        self.assertIsNone(choose_coding('identity;q=0', self.codings))
+        self.assertIsNone(choose_coding('', self.codings))
+        self.assertEqual(choose_coding('identity;q=0, gzip', self.codings), 'gzip')
+        self.assertEqual(choose_coding('br;q=1.2.3, gzip;q=0.1', self.codings), 'gzip')
+        self.assertEqual(choose_coding('br;level=9, gzip;q=0.1', self.codings), 'gzip')
+
+    def test_is_compressible(self):
+        for content_type in ('application/json', 'text/html; charset=utf-8', 'text/csv', 'image/svg+xml', ''):
+            with self.subTest(content_type=content_type):
+                self.assertTrue(is_compressible(content_type))
+        for content_type in ('image/jpeg', 'Video/MP4', 'audio/mpeg', 'font/woff2', 'application/zip; name=a.zip'):
+            with self.subTest(content_type=content_type):
+                self.assertFalse(is_compressible(content_type))
+
+    def process(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response).process_response(request, response)
+
+    def test_compresses_large_text_responses(self):
+        body = b'{"title": "Sunset over Sydney"}' * 100
+        response = self.process(HttpResponse(body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_compresses_streaming_responses(self):
+        body = [b'{"title": "Sunset over Sydney"}\n'] * 100
+        response = self.process(StreamingHttpResponse(iter(body), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(body))
+
+    @override_settings(COMPRESSION_MIN_SIZE=100)
+    def test_leaves_small_responses_alone(self):
+        self.assertFalse(self.process(HttpResponse(b'a' * 99)).has_header('Content-Encoding'))
+        self.assertEqual(self.process(HttpResponse(b'a' * 100))['Content-Encoding'], 'gzip')
+
+    def test_leaves_compressed_types_alone(self):
+        response = self.process(HttpResponse(b'\0' * 4096, content_type='image/jpeg'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.content), 4096)
+
+    def test_leaves_ranges_and_encoded_responses_alone(self):
+        partial = HttpResponse(b'a' * 4096, status=206)
+        ranged = HttpResponse(b'a' * 4096)
+        ranged['Content-Range'] = 'bytes 0-4095/8192'
+        encoded = HttpResponse(b'a' * 4096)
+        encoded['Content-Encoding'] = 'br'
+        for response in (partial, ranged, encoded):
+            with self.subTest(response=response):
+                self.assertEqual(self.process(response).content, b'a' * 4096)
+        self.assertEqual(encoded['Content-Encoding'], 'br')
+
+    def test_weakens_strong_etags(self):
+        response = HttpResponse(b'a' * 4096)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_leaves_clients_that_accept_no_coding_alone(self):
+        response = self.process(HttpResponse(b'a' * 4096), accept_encoding='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+class RangeTests(SimpleTestCase):
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes = 10 - 19', 1000), (10, 19))
+        self.assertEqual(parse_range('bytes=900-2000', 1000), (900, 999))
+
+    def test_open_ended_and_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (('bytes=1000-', 1000), ('bytes=1000-1999', 1000), ('bytes=-0', 1000), ('bytes=0-', 0), ('bytes=-10', 0)):
+            with self.subTest(header=header, size=size), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, size)
+
+    def test_whole_file_for_ranges_it_does_not_answer(self):
+        for header in ('bytes=0-99,200-299', 'bytes=-', 'bytes=99-0', 'items=0-9', 'bytes=a-b', ''):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def request(self, if_range=None):
+        headers = {'HTTP_IF_RANGE': if_range} if if_range is not None else {}
+        return RequestFactory().get('/', HTTP_RANGE='bytes=0-99', **headers)
+
+    def test_if_range(self):
+        last_modified = timezone.now().replace(microsecond=0)
+        validators = file_validators('data/videos/clip.mp4', 1000, last_modified)
+        self.assertTrue(if_range_matches(self.request(), validators))
+        self.assertTrue(if_range_matches(self.request(validators.etag), validators))
+        self.assertTrue(if_range_matches(self.request(http_date(validators.timestamp)), validators))
+
+    def test_if_range_mismatch(self):
+        last_modified = timezone.now().replace(microsecond=0)
+        validators = file_validators('data/videos/clip.mp4', 1000, last_modified)
+        # Any change to the name, size or record gives a new ETag.
+        for other in (
+            file_validators('data/videos/other.mp4', 1000, last_modified),
+            file_validators('data/videos/clip.mp4', 1001, last_modified),
+        ):
+            self.assertFalse(if_range_matches(self.request(other.etag), validators))
+        self.assertFalse(if_range_matches(self.request('W/' + validators.etag), validators))
+        self.assertFalse(if_range_matches(self.request(http_date(validators.timestamp - 60)), validators))
+        self.assertFalse(if_range_matches(self.request('not a date'), validators))
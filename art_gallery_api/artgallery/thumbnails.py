@@ -0,0 +1,148 @@
+"""
+Server-side thumbnails for artwork images.
+
+Once an image is stored the artwork is marked `pending` and a job is handed to
+a small pool of threads, so the request never waits on Pillow. The job scales
+the image to each of `THUMBNAIL_WIDTHS` that is narrower than the original,
+stores the results under the thumbnail field's directory, records their names
+in `thumbnails` and marks the artwork `ready`, or `failed` if the image could
+not be read. The `THUMBNAIL_DEFAULT_WIDTH` copy also becomes `thumbnail`.
+
+At most `THUMBNAIL_WORKERS` jobs run and `THUMBNAIL_QUEUE_SIZE` wait at once.
+Anything beyond that, as well as artworks added by bulk creation, stays
+`pending` until `manage.py generate_thumbnails` is run.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from artgallery.cache import FeedCache
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+JPEG_QUALITY = 85
+
+
+def thumbnail_widths():
+    return sorted(getattr(settings, 'THUMBNAIL_WIDTHS', (160, 320, 640)))
+
+
+def render(image, width):
+    """Return `image` scaled to `width` pixels wide, encoded, and the file extension to use."""
+    height = max(round(image.height * width / image.width), 1)
+    scaled = image.resize((width, height), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    if scaled.mode in ('RGBA', 'LA', 'P'):
+        # Keep transparency, which JPEG cannot hold.
+        scaled.save(output, 'PNG', optimize=True)
+        return output.getvalue(), 'png'
+    scaled.convert('RGB').save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return output.getvalue(), 'jpg'
+
+
+def generate(model, pk):
+    """
+    Make the thumbnails of record `pk` of `model` from its `image` and record
+    them. Returns the new thumbnail status, or None if the record is gone.
+    """
+    record = model.objects.filter(pk=pk).values('image').first()
+    if record is None:
+        return None
+    image_field = model._meta.get_field('image')
+    thumbnail_field = model._meta.get_field('thumbnail')
+    storage = thumbnail_field.storage
+    changes = {'thumbnail_status': FAILED}
+    try:
+        with image_field.storage.open(record['image']) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+        names = {}
+        for width in thumbnail_widths():
+            if width >= image.width and names:
+                break
+            content, extension = render(image, min(width, image.width))
+            name = '{}{}/{}.{}'.format(thumbnail_field.upload_to, pk, width, extension)
+            # Names are fixed per artwork and width, so regenerating replaces the old files.
+            storage.delete(name)
+            names[str(width)] = storage.save(name, ContentFile(content))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception('Could not make thumbnails for %s %s', model._meta.label, pk)
+    else:
+        default_width = str(getattr(settings, 'THUMBNAIL_DEFAULT_WIDTH', 320))
+        changes = {
+            'thumbnail_status': READY,
+            'thumbnails': json.dumps(names),
+            'thumbnail': names.get(default_width, names[max(names, key=int)]),
+        }
+    # `update()` skips `save` and its signals, so the modification time and
+    # the feeds are handled here.
+    model.objects.filter(pk=pk).update(last_modified=timezone.now(), **changes)
+    FeedCache(model).invalidate()
+    return changes['thumbnail_status']
+
+
+class ThumbnailPool():
+    """A bounded pool of threads making thumbnails."""
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+                self._slots = threading.BoundedSemaphore(workers + getattr(settings, 'THUMBNAIL_QUEUE_SIZE', 64))
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+
+    def schedule(self, model, pk):
+        """
+        Queue thumbnails for record `pk` of `model` without waiting. Returns False
+        if the pool is full, leaving the record pending.
+        """
+        self._start()
+        if not self._slots.acquire(blocking=False):
+            logger.warning('Thumbnail pool is full, %s %s left pending', model._meta.label, pk)
+            return False
+        self._executor.submit(self._run, model, pk)
+        return True
+
+    def _run(self, model, pk):
+        try:
+            generate(model, pk)
+        except Exception:
+            logger.exception('Could not make thumbnails for %s %s', model._meta.label, pk)
+        finally:
+            close_old_connections()
+            self._slots.release()
+
+
+pool = ThumbnailPool()
+
+
+class ThumbnailsField(serializers.Field):
+    """The generated thumbnails of a record, shown as `{width: url}`."""
+
+    def __init__(self, storage, **kwargs):
+        self.storage = storage
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        names = json.loads(value) if value else {}
+        return {width: self.storage.url(name) for width, name in names.items()}
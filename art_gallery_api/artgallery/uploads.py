@@ -0,0 +1,240 @@
+"""
+Resumable uploads of large files in chunks.
+
+1. `POST /api/uploads` with the file's `filename`, `size` and `sha256` starts a
+   session and returns its id.
+2. `PUT /api/uploads/<id>` with an `Upload-Offset` header appends the request
+   body to the session's file. The offset must be the number of bytes already
+   received, which `GET /api/uploads/<id>` reports, so after a dropped
+   connection the client asks for the offset and carries on from there.
+3. `POST /api/uploads/<id>` with a `type` and `field`, once every byte is in,
+   checks the size and SHA-256 and moves the file into that field's storage
+   directory. With an `id` the file is also attached to that record. Otherwise
+   the returned name can be given for the field in a bulk creation.
+
+Sessions are a data file and a JSON file of metadata in `UPLOAD_DIR`, so any
+process can take the next chunk. The file is renamed into storage rather than
+copied, which needs `UPLOAD_DIR` on the same filesystem as the media files.
+Sessions untouched for `UPLOAD_SESSION_TTL` seconds are deleted.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from artgallery import thumbnails
+from artgallery.cache import FeedCache
+from artworks.models import Artwork
+from videos.models import Video
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+"""
+The file fields an upload can be finished into, by type and field name.
+"""
+UPLOAD_TARGETS = {
+    'artworks': (Artwork, ('image', 'thumbnail')),
+    'videos': (Video, ('video', 'thumbnail')),
+}
+
+
+class UploadError(Exception):
+    """A request that does not fit the state of the upload session."""
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.message = message
+        self.offset = offset
+
+
+def upload_dir():
+    directory = Path(getattr(settings, 'UPLOAD_DIR', Path(settings.BASE_DIR) / 'data' / 'uploads'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def max_upload_size():
+    return getattr(settings, 'UPLOAD_MAX_BYTES', 8 * 1024 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'UPLOAD_MAX_CHUNK_BYTES', 64 * 1024 * 1024)
+
+
+def remove_expired(now=None):
+    """Delete the sessions that have not been touched for `UPLOAD_SESSION_TTL` seconds."""
+    cutoff = (now or time.time()) - getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 60 * 60)
+    for meta in upload_dir().glob('*.json'):
+        try:
+            data_path = meta.with_suffix('.part')
+            last_used = max(meta.stat().st_mtime, data_path.stat().st_mtime if data_path.exists() else 0)
+            if last_used < cutoff:
+                data_path.unlink(missing_ok=True)
+                meta.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+
+
+class UploadSession():
+    """An upload in progress, stored as `<id>.part` and `<id>.json` in `UPLOAD_DIR`."""
+
+    def __init__(self, session_id, meta):
+        self.id = session_id
+        self.meta = meta
+
+    @property
+    def data_path(self):
+        return upload_dir() / (self.id + '.part')
+
+    @property
+    def meta_path(self):
+        return upload_dir() / (self.id + '.json')
+
+    @property
+    def offset(self):
+        try:
+            return self.data_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def create(cls, user_id, filename, size, sha256):
+        """Start a session for a file of `size` bytes, checked against `sha256` when finished."""
+        filename = os.path.basename(str(filename or '')).strip()
+        if not filename:
+            raise UploadError('filename is required')
+        if not isinstance(size, int) or isinstance(size, bool) or not 0 < size <= max_upload_size():
+            raise UploadError('size must be a number of bytes up to {}'.format(max_upload_size()))
+        sha256 = str(sha256 or '').lower()
+        if len(sha256) != 64 or any(char not in '0123456789abcdef' for char in sha256):
+            raise UploadError('sha256 must be the hex SHA-256 digest of the whole file')
+        remove_expired()
+        session = cls(secrets.token_hex(16), {'user': user_id, 'filename': filename, 'size': size, 'sha256': sha256})
+        session.data_path.touch()
+        session.meta_path.write_text(json.dumps(session.meta))
+        return session
+
+    @classmethod
+    def get(cls, session_id, user_id):
+        """Return the session `session_id` of user `user_id`, or None."""
+        if not session_id.isalnum():
+            return None
+        try:
+            meta = json.loads((upload_dir() / (session_id + '.json')).read_text())
+        except FileNotFoundError:
+            return None
+        if meta['user'] != user_id:
+            return None
+        return cls(session_id, meta)
+
+    def to_representation(self):
+        return {'id': self.id, 'filename': self.meta['filename'], 'size': self.meta['size'], 'offset': self.offset}
+
+    def append(self, stream, offset, length):
+        """
+        Append `length` bytes read from `stream` at `offset`, which must be the
+        number of bytes received so far, and return the new offset.
+        """
+        if length > max_chunk_size():
+            raise UploadError('Chunks can be at most {} bytes'.format(max_chunk_size()), self.offset)
+        with open(self.data_path, 'ab') as file:
+            # One chunk at a time per session, even across processes.
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError('Another chunk of this upload is being written', self.offset)
+            current = os.fstat(file.fileno()).st_size
+            if offset != current:
+                raise UploadError('Upload-Offset must be {}'.format(current), current)
+            if current + length > self.meta['size']:
+                raise UploadError('The chunk goes past the size of the upload', current)
+            remaining = length
+            while remaining:
+                block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                file.write(block)
+                remaining -= len(block)
+            file.flush()
+            if remaining:
+                # The connection dropped mid-chunk. What arrived is kept, so
+                # the client resumes from the offset reported.
+                raise UploadError('The chunk ended early', current + length - remaining)
+            return current + length
+
+    def finish(self, name, field, record_id=None):
+        """
+        Check the file and move it into the storage of `field` of type `name`,
+        attaching it to record `record_id` if given. Returns the stored name.
+        """
+        if name not in UPLOAD_TARGETS or field not in UPLOAD_TARGETS[name][1]:
+            raise UploadError('type and field must be one of ' + ', '.join(
+                '{}.{}'.format(target, each) for target, (model, fields) in UPLOAD_TARGETS.items() for each in fields
+            ))
+        model = UPLOAD_TARGETS[name][0]
+        if record_id is not None and not model.objects.filter(pk=record_id).exists():
+            raise UploadError('No {} has id {}'.format(name[:-1], record_id))
+        offset = self.offset
+        if offset != self.meta['size']:
+            raise UploadError('Only {} of {} bytes have been received'.format(offset, self.meta['size']), offset)
+        try:
+            file = open(self.data_path, 'rb')
+        except FileNotFoundError:
+            # A concurrent call finished the upload since the offset was read.
+            raise UploadError('The upload has already been finished', 0)
+        with file:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError('A chunk of this upload is being written', offset)
+            if not self.data_path.exists():
+                # The file was opened just before a concurrent call moved it.
+                raise UploadError('The upload has already been finished', 0)
+            digest = hashlib.sha256()
+            for block in iter(lambda: file.read(COPY_BLOCK_SIZE), b''):
+                digest.update(block)
+            if digest.hexdigest() != self.meta['sha256']:
+                raise UploadError('The SHA-256 of the upload does not match', offset)
+            model_field = model._meta.get_field(field)
+            stored_name = self._move_into(model_field.storage, model_field.generate_filename(None, self.meta['filename']))
+        self.meta_path.unlink(missing_ok=True)
+
+        if record_id is not None:
+            changes = {field: stored_name, 'last_modified': timezone.now()}
+            if model is Artwork and field == 'image':
+                changes['thumbnail_status'] = thumbnails.PENDING
+            # `update()` skips `save` and its signals, so the feeds are invalidated here.
+            model.objects.filter(pk=record_id).update(**changes)
+            FeedCache(model).invalidate()
+            if model is Artwork and field == 'image':
+                thumbnails.pool.schedule(Artwork, record_id)
+        return stored_name
+
+    def _move_into(self, storage, name):
+        if isinstance(storage, FileSystemStorage):
+            name = storage.get_available_name(name)
+            path = storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(self.data_path, path)
+                return name
+            except OSError:
+                # On another filesystem the file has to be copied after all.
+                pass
+        with open(self.data_path, 'rb') as file:
+            stored_name = storage.save(name, File(file))
+        self.data_path.unlink(missing_ok=True)
+        return stored_name
+
+    def delete(self):
+        self.data_path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
@@ -16,6 +16,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, re_path, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from artgallery import views
 
 urlpatterns = [
     path('admin/doc/', include('django.contrib.admindocs.urls')) ,
@@ -23,6 +24,10 @@ urlpatterns = [
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    re_path(r'api/search$', views.Search.as_view()),
+    re_path(r'api/export/(?P<name>artworks|artists|videos)$', views.Export.as_view()),
+    re_path(r'api/uploads$', views.Uploads.as_view()),
+    re_path(r'api/uploads/(?P<pk>[0-9a-f]+)$', views.UploadDetail.as_view()),
     re_path(r'^', include('videos.urls')),
     re_path(r'^', include('users.urls')),
     re_path(r'^', include('artists.urls')),
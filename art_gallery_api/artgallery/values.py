@@ -0,0 +1,132 @@
+"""
+A read-only serializer for the list views that works on `.values()` rows.
+
+A DRF serializer resolves each field of each row through its field machinery:
+attribute lookup, a `to_representation` call, and for files a `FieldFile` built
+around the name just to read its URL. `ValuesSerializer` looks at the fields of
+a serializer once, picks the cheapest function that gives the same output for
+each, and then applies those functions to plain dict rows, which skips building
+model instances as well.
+"""
+
+import datetime
+from functools import lru_cache
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import fields as serializer_fields
+from rest_framework.fields import ISO_8601
+from rest_framework.settings import api_settings
+
+from artgallery.pagination import KeysetPagination
+
+"""
+Fields whose representation of a value already of the right type is the value
+itself. Rows from `.values()` carry values of the model field's type.
+"""
+IDENTITY_FIELDS = (
+    serializer_fields.BooleanField,
+    serializer_fields.CharField,
+    serializer_fields.ChoiceField,
+    serializer_fields.FloatField,
+    serializer_fields.IntegerField,
+)
+
+
+def _identity(value):
+    return value
+
+
+def _file_url(storage):
+    if isinstance(storage, FileSystemStorage):
+        # `FileSystemStorage.url` joins the quoted name onto `base_url`. Quoting
+        # leaves no characters that `urljoin` treats specially, and stored names
+        # never hold dot segments, so the join is a plain concatenation.
+        base_url = storage.base_url
+
+        def convert(name):
+            return base_url + filepath_to_uri(name).lstrip('/') if name else None
+        return convert
+
+    def convert(name):
+        return storage.url(name) if name else None
+    return convert
+
+
+def _datetime(field):
+    """
+    Return a converter for an ISO 8601 `DateTimeField` shown in UTC, the API's
+    setting, or None if the field is configured any other way.
+    """
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+        return None
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None or datetime.datetime(2000, 1, 1, tzinfo=field_timezone).utcoffset():
+        return None
+    to_representation = field.to_representation
+
+    def convert(value):
+        if value is None or value.tzinfo is None or value.utcoffset():
+            return to_representation(value)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _not_none(to_representation):
+    def convert(value):
+        return None if value is None else to_representation(value)
+    return convert
+
+
+def _converter(model, name, field):
+    if isinstance(field, serializer_fields.FileField):
+        # Without a request in the context DRF gives the storage URL of the file.
+        return _file_url(model._meta.get_field(name).storage)
+    if type(field) in IDENTITY_FIELDS:
+        return _identity
+    if isinstance(field, serializer_fields.DateTimeField):
+        convert = _datetime(field)
+        if convert is not None:
+            return convert
+    return _not_none(field.to_representation)
+
+
+class ValuesSerializer():
+    """
+    Read-only output identical to `serializer_class(..., fields=fields).data`,
+    built from dict rows.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class(fields=fields)
+        # Plain serializers have no model, and no file fields that would need one.
+        model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        self.converters = [
+            (name, _converter(model, name, field))
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+        # The rows must also carry the fields the cursors are built from.
+        self.columns = list(dict.fromkeys([name for name, convert in self.converters] + list(KeysetPagination.ordering)))
+
+    def values(self, queryset):
+        """Return `queryset` as dict rows holding the columns this serializer needs."""
+        return queryset.values(*self.columns)
+
+    def to_representation(self, row):
+        return {name: convert(row[name]) for name, convert in self.converters}
+
+    def data(self, rows):
+        converters = self.converters
+        return [{name: convert(row[name]) for name, convert in converters} for row in rows]
+
+
+def values_serializer(serializer_class, fields=None):
+    """Return the `ValuesSerializer` for `serializer_class`, compiled once per field selection."""
+    return _compiled(serializer_class, tuple(fields) if fields is not None else None)
+
+
+@lru_cache(maxsize=64)
+def _compiled(serializer_class, fields):
+    return ValuesSerializer(serializer_class, fields)
@@ -0,0 +1,342 @@
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, OpenApiResponse
+from artgallery.authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from artgallery import export
+from artgallery.uploads import UploadError, UploadSession
+from artgallery.groups import GroupPermissions
+from artgallery.search import search_instances
+from artists.models import Artist
+from artists.serializers import ArtistSerializer
+from artworks.models import Artwork
+from artworks.serializers import ArtworkSerializer
+from videos.models import Video
+from videos.serializers import VideoSerializer
+
+"""
+Each searchable type maps to its model, its serializer and the group check from
+its own list view, so search never returns anything the list view would hide.
+"""
+SEARCHABLE = {
+    'artworks': (Artwork, ArtworkSerializer, GroupPermissions.UsersOnly),
+    'artists': (Artist, ArtistSerializer, None),
+    'videos': (Video, VideoSerializer, GroupPermissions.StaffOrManagerOnly),
+}
+
+
+class Search(APIView):
+    """
+    View to search artworks, artists and videos by text, best match first.
+
+    * Requires basic or bearer token authentication.
+    * Only users with accounts can search
+    * Videos are only searched for staff and managers
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    max_limit = 100
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('q', str, description='The words to search for.', required=True),
+            OpenApiParameter('types', str, description='Comma separated types to search, from artworks, artists and videos. Defaults to all of them.'),
+            OpenApiParameter('limit', int, description='The maximum number of results for each type, up to 100. Defaults to 20.'),
+        ],
+        examples=[
+            OpenApiExample(
+                'Returned data',
+                status_codes=['200'],
+                value =
+                {
+                    "artists": [
+                        {
+                            "id": 2,
+                            "title": "Vincent Namatjira",
+                            "sort_title": "Namatjira, Vincent",
+                            "birth_date": 1983,
+                            "death_date": 'null',
+                            "description": "An artist",
+                            "created_date": "2022-10-12T01:13:36.219000Z",
+                            "last_modified": "2022-10-12T02:43:04.347000Z",
+                            "score": 10.5
+                        }
+                    ]
+                },
+            )
+        ],
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the matching records of each type, ranked by relevance.'),
+            400: OpenApiResponse(response=int, description='The query is missing or an unknown type was requested.'),
+        }
+    )
+    def get(self, request, format=None):
+        """
+        Return ranked search results.
+        """
+        auth_denied = GroupPermissions.UsersOnly(request.user.role, 'search the collection')
+        if auth_denied is not None:
+            return auth_denied
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return Response({'message': 'A search query is required'}, status=status.HTTP_400_BAD_REQUEST)
+        # An empty `types` means all of them, like leaving it out.
+        types = [name for name in request.GET.get('types', '').split(',') if name] or list(SEARCHABLE)
+        unknown = [name for name in types if name not in SEARCHABLE]
+        if unknown:
+            return Response({'message': 'Unknown search types: ' + ', '.join(unknown)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            return Response({'message': 'The limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = {}
+        for name in types:
+            model, serializer_class, group_check = SEARCHABLE[name]
+            if group_check is not None and group_check(request.user.role) is not None:
+                continue
+            instances = search_instances(model, query, limit)
+            data = serializer_class(instances, many=True).data
+            for item, instance in zip(data, instances):
+                item['score'] = instance.search_score
+            results[name] = data
+        return Response(results)
+
+
+class Export(APIView):
+    """
+    View to export every artwork, artist or video as NDJSON or CSV.
+
+    * Requires basic or bearer token authentication.
+    * Only staff and managers can export the catalogue
+    * The `export_catalogue` management command writes the same output to a file
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('output', str, description='ndjson (the default) or csv.'),
+            OpenApiParameter('fields', str, description='Comma separated fields to export. Defaults to every field the API shows.'),
+            OpenApiParameter('modified_since', str, description='Only records modified at or after this ISO 8601 date and time.'),
+        ],
+        responses={
+            200: OpenApiResponse(response=int, description='Streams one record per line, oldest modification first.'),
+            400: OpenApiResponse(response=int, description='An unknown output format or field, or an invalid date.'),
+        }
+    )
+    def get(self, request, name, format=None):
+        """
+        Stream the export.
+        """
+        auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'export the catalogue')
+        if auth_denied is not None:
+            return auth_denied
+        output = request.GET.get('output', 'ndjson')
+        if output not in export.EXPORT_OUTPUTS:
+            return Response({'message': 'output must be one of ' + ', '.join(export.EXPORT_OUTPUTS)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fields = export.parse_fields(name, request.GET.get('fields'))
+            modified_since = export.parse_modified_since(request.GET.get('modified_since'))
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = export.export_rows(name, fields, modified_since)
+        response = StreamingHttpResponse(export.render(output, rows, fields), content_type=export.EXPORT_OUTPUTS[output])
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(name, output)
+        return response
+
+
+def upload_error_response(error):
+    """A 409 with the offset to carry on from if the error concerns the session's state, otherwise a 400."""
+    if error.offset is None:
+        return Response({'message': error.message}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'message': error.message, 'offset': error.offset}, status=status.HTTP_409_CONFLICT)
+
+
+class Uploads(APIView):
+    """
+    View to start a resumable upload of a large image or video, see `artgallery.uploads`.
+
+    * Requires basic or bearer token authentication.
+    * Only staff and managers can upload files
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Start an upload',
+                request_only=True,
+                value =
+                {
+                    "filename": "interview.mov",
+                    "size": 2147483648,
+                    "sha256": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+                },
+            ),
+            OpenApiExample(
+                'Started upload',
+                status_codes=['201'],
+                value =
+                {
+                    "id": "5f2b7c1e9a0d4e6b8c3a1f0e2d4b6a8c",
+                    "filename": "interview.mov",
+                    "size": 2147483648,
+                    "offset": 0
+                },
+            )
+        ],
+        responses={
+            201: OpenApiResponse(response=int, description='Returns the new upload session.'),
+            400: OpenApiResponse(response=int, description='A missing filename, or an invalid size or checksum.'),
+        }
+    )
+    def post(self, request, format=None):
+        """
+        Start an upload.
+        """
+        auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'upload files')
+        if auth_denied is not None:
+            return auth_denied
+        try:
+            session = UploadSession.create(request.user.pk, request.data.get('filename'), request.data.get('size'), request.data.get('sha256'))
+        except UploadError as error:
+            return upload_error_response(error)
+        return Response(session.to_representation(), status=status.HTTP_201_CREATED)
+
+
+class UploadDetail(APIView):
+    """
+    View to send the chunks of an upload and finish it.
+
+    * Requires basic or bearer token authentication.
+    * Only the user who started an upload can use it
+    * Chunks are read from the request body only after the permission checks
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    def get_session(self, request, pk):
+        auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'upload files')
+        if auth_denied is not None:
+            return None, auth_denied
+        session = UploadSession.get(pk, request.user.pk)
+        if session is None:
+            return None, Response({'message': 'The upload does not exist'}, status=status.HTTP_404_NOT_FOUND)
+        return session, None
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the upload with the number of bytes received as its offset.'),
+            404: OpenApiResponse(response=int, description='The given id does not match any upload of this user.'),
+        }
+    )
+    def get(self, request, pk):
+        """
+        Return the upload, to find the offset to resume from.
+        """
+        session, denied = self.get_session(request, pk)
+        if denied is not None:
+            return denied
+        return Response(session.to_representation())
+
+    @extend_schema(
+        parameters=[OpenApiParameter('Upload-Offset', int, OpenApiParameter.HEADER, required=True, description='The number of bytes received so far.')],
+        request={'application/offset+octet-stream': bytes},
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the upload with its new offset.'),
+            409: OpenApiResponse(response=int, description='The offset is not the number of bytes received so far, or the chunk did not fit. Returns the offset to resume from.'),
+            411: OpenApiResponse(response=int, description='The chunk has no Content-Length.'),
+        }
+    )
+    def put(self, request, pk):
+        """
+        Append the request body to the upload.
+        """
+        session, denied = self.get_session(request, pk)
+        if denied is not None:
+            return denied
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+        except (KeyError, ValueError):
+            return Response({'message': 'Upload-Offset must be the number of bytes received so far', 'offset': session.offset}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'message': 'Chunks must have a Content-Length'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        if length:
+            try:
+                session.append(request.stream, offset, length)
+            except UploadError as error:
+                return upload_error_response(error)
+        return Response(session.to_representation())
+
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Finish an upload into a new video',
+                request_only=True,
+                value =
+                {
+                    "type": "videos",
+                    "field": "video"
+                },
+            ),
+            OpenApiExample(
+                'Finish an upload into an existing artwork',
+                request_only=True,
+                value =
+                {
+                    "type": "artworks",
+                    "field": "image",
+                    "id": 4
+                },
+            ),
+            OpenApiExample(
+                'Finished upload',
+                status_codes=['200'],
+                value =
+                {
+                    "name": "data/videos/interview.mov"
+                },
+            )
+        ],
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the stored name of the file, to use for the field when creating records.'),
+            400: OpenApiResponse(response=int, description='An unknown type, field or record.'),
+            409: OpenApiResponse(response=int, description='The upload is incomplete or its checksum does not match.'),
+        }
+    )
+    def post(self, request, pk):
+        """
+        Check the upload and move it into storage, attaching it to a record if an id is given.
+        """
+        session, denied = self.get_session(request, pk)
+        if denied is not None:
+            return denied
+        record_id = request.data.get('id')
+        if record_id is not None and (not isinstance(record_id, int) or isinstance(record_id, bool)):
+            return Response({'message': 'id must be the id of a record'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            name = session.finish(request.data.get('type'), request.data.get('field'), record_id)
+        except UploadError as error:
+            return upload_error_response(error)
+        return Response({'name': name})
+
+    @extend_schema(
+        responses={
+            204: OpenApiResponse(response=int, description='Returns nothing once the upload is discarded.'),
+            404: OpenApiResponse(response=int, description='The given id does not match any upload of this user.'),
+        }
+    )
+    def delete(self, request, pk):
+        """
+        Discard an upload.
+        """
+        session, denied = self.get_session(request, pk)
+        if denied is not None:
+            return denied
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,22 @@
+# Generated by Django 4.1 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_rename_birthdate_artist_birth_date_and_more'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='artist',
+            old_name='modified_date',
+            new_name='last_modified',
+        ),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['last_modified', 'id'], name='artist_modified_idx'),
+        ),
+    ]
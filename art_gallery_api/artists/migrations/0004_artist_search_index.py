@@ -0,0 +1,27 @@
+from django.db import migrations
+from artgallery.search import create_search_index, drop_search_index
+
+# The weights the index is made with. Later changes need a migration of their own.
+WEIGHTS = {
+    'title': 10,
+    'description': 1,
+}
+
+
+def create_index(apps, schema_editor):
+    create_search_index(apps.get_model('artists', 'Artist'), WEIGHTS, schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(apps.get_model('artists', 'Artist'), schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0003_rename_modified_date_artist_last_modified_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -12,6 +12,31 @@ class Artist(models.Model):
     created_date = models.DateTimeField(auto_now_add=True, blank=False, editable=False)
     last_modified = models.DateTimeField(auto_now=True, blank=False, editable=False)
 
+    # Fields copied onto other records, which must be updated when these change.
+    copied_fields = ['title']
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified', 'id'], name='artist_modified_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the copied fields as loaded, so a save can tell if they changed.
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            field: getattr(instance, field) for field in cls.copied_fields if field in field_names
+        }
+        return instance
+
+    def changed_copied_fields(self):
+        """Return the new values of the copied fields that changed since the artist was loaded."""
+        loaded = getattr(self, '_loaded_values', {})
+        return {
+            field: getattr(self, field) for field, value in loaded.items()
+            if getattr(self, field) != value
+        }
+
     def __str__(self):
         """ The representation that is visible in the admin """
         return self.sort_title
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Propagation of artist fields copied onto artworks.
+
+Each artwork keeps the title of its artist in `artist_title` so lists can show
+it without a lookup. When an artist's title changes, the artist is queued here
+and a background thread rewrites the copies with `update_many` calls of at
+most `ARTIST_TITLE_BATCH_SIZE` artworks each, so saving the artist never waits
+on the write. Changes to the same artist made before the thread gets to them
+are merged into one.
+
+The queue lives in memory, so changes still pending when a process exits are
+lost. `manage.py reconcile_artist_titles` finds and repairs any copies that
+have drifted, whatever the cause.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from artgallery.cache import FeedCache
+from artgallery.mongo import collection
+from artworks.models import Artwork
+
+logger = logging.getLogger(__name__)
+
+"""
+The artist fields copied onto artworks, mapped to the artwork field holding
+each copy.
+"""
+COPIED_FIELDS = {
+    'title': 'artist_title',
+}
+
+
+def update_copies(artist_id, values, batch_size=None):
+    """
+    Set the copies of `values`, a dict of artist fields, on every artwork of
+    artist `artist_id` that is out of date. Returns the number of artworks
+    updated.
+    """
+    batch_size = batch_size or getattr(settings, 'ARTIST_TITLE_BATCH_SIZE', 500)
+    copies = {COPIED_FIELDS[field]: value for field, value in values.items()}
+    artworks = collection(Artwork)
+    stale = {'artist_id': artist_id, '$or': [{field: {'$ne': value}} for field, value in copies.items()]}
+    updated = 0
+    while True:
+        ids = [document['_id'] for document in artworks.find(stale, {'_id': 1}).limit(batch_size)]
+        if not ids:
+            break
+        # The artworks change, so they are marked modified for the conditional
+        # GET validators, the feed cache and incremental exports.
+        result = artworks.update_many(
+            {'_id': {'$in': ids}},
+            {'$set': dict(copies, last_modified=timezone.now())}
+        )
+        updated += result.modified_count
+        if len(ids) < batch_size:
+            break
+    if updated:
+        FeedCache(Artwork).invalidate()
+    return updated
+
+
+class Propagator():
+    """A queue of artist changes, written out to the artworks by a daemon thread."""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def enqueue(self, artist_id, values):
+        """Queue the new `values` of artist `artist_id` to be copied onto its artworks."""
+        with self._lock:
+            self._pending.setdefault(artist_id, {}).update(values)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='artist-propagation', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self):
+        """Write every queued change in the calling thread."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                artist_id, values = self._pending.popitem()
+            try:
+                update_copies(artist_id, values)
+            except Exception:
+                logger.exception('Could not update the artworks of artist %s', artist_id)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+propagator = Propagator()
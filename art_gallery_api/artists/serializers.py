@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from artgallery.fieldsets import SparseFieldsMixin
 from artists.models import Artist
 
-class ArtistSerializer(serializers.ModelSerializer):
+class ArtistSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Artist
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from artists.models import Artist
+from artists.propagation import propagator
+
+
+@receiver(post_save, sender=Artist)
+def propagate_copied_fields(sender, instance, created, **kwargs):
+    """
+    Queue the copied fields of an artist that changed, so a background thread
+    updates the artworks holding copies of them.
+    """
+    if created:
+        return
+    changed = instance.changed_copied_fields()
+    if changed:
+        propagator.enqueue(instance.pk, changed)
+        instance._loaded_values.update(changed)
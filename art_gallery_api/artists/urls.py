@@ -5,4 +5,5 @@ from artists import views
 urlpatterns = [
     re_path(r'api/artists$', views.ListArtists.as_view()),
     re_path(r'api/artists/(?P<pk>[0-9]+)$', views.ListArtistDetail.as_view()),
+    re_path(r'api/artists/(?P<pk>[0-9]+)/artworks$', views.ListArtistArtworks.as_view()),
 ]
\ No newline at end of file
@@ -2,70 +2,133 @@ from rest_framework import status
 from rest_framework.parsers import FormParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 from rest_framework import serializers
+from artgallery.authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from artgallery.batch import ids_parameter, ids_response
+from artgallery.bulk import bulk_create_response, is_bulk_request
+from artgallery.conditional import Validators, instance_validators, last_modified_of, queryset_validators
+from artgallery.facets import grouped_counts
+from artgallery.fieldsets import fieldset_parameters, project, sparse_fields
 from artgallery.groups import GroupPermissions
+from artgallery.pagination import KeysetPagination
+from artgallery.streaming import stream_json, stream_parameter, wants_stream
+from artgallery.values import values_serializer
 from django.db import DatabaseError
 from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer, OpenApiResponse
 from artists.models import Artist
 from artists.serializers import ArtistSerializer
+from artworks.models import Artwork
+from artworks.serializers import ArtworkSerializer
+
+"""
+Pages of artists and single artists are shown with an `artwork_count`, the
+number of artworks whose `artist_id` is theirs. It is not a model field, so it
+is split off any field selection before the query, and the counts for a whole
+page come from one grouped aggregation on the indexed `artist_id`.
+"""
+ARTWORK_COUNT = 'artwork_count'
+
+
+def split_artwork_count(fields):
+    """Return `fields` without `artwork_count`, and whether it was selected."""
+    if fields is None:
+        return None, True
+    return [name for name in fields if name != ARTWORK_COUNT], ARTWORK_COUNT in fields
+
+
+def add_artwork_counts(rows, results):
+    """Set the `artwork_count` of each of `results` from the id of the matching row."""
+    counts = grouped_counts(Artwork, 'artist_id', [row['id'] for row in rows])
+    for row, result in zip(rows, results):
+        result[ARTWORK_COUNT] = counts.get(row['id'], 0)
+    return results
+
 
 class ListArtists(APIView):
     """
     View to list all artists in the system from model: `artists.Artist`.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only staff and managers are able to update or create artists.
     * Only managers can delete artists
     """
 
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
 
     @extend_schema(
+        parameters=[stream_parameter, ids_parameter, *fieldset_parameters],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "title": "Tracey Moffatt",
-                            "sort_title": "Moffatt, Tracey",
-                            "birth_date": 1960,
-                            "death_date": 'null',
-                            "description": "",
-                            "created_date": "2022-10-12T01:07:29.774000Z",
-                            "last_modified": "2022-10-12T01:07:29.774000Z"
-                        },
-                        {
-                            "id": 2,
-                            "title": "Vincent Namatjira",
-                            "sort_title": "Namatjira, Vincent",
-                            "birth_date": 1983,
-                            "death_date": 'null',
-                            "description": "An artist",
-                            "created_date": "2022-10-12T01:13:36.219000Z",
-                            "last_modified": "2022-10-12T02:43:04.347000Z"
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "Tracey Moffatt",
+                                "sort_title": "Moffatt, Tracey",
+                                "birth_date": 1960,
+                                "death_date": 'null',
+                                "description": "",
+                                "created_date": "2022-10-12T01:07:29.774000Z",
+                                "last_modified": "2022-10-12T01:07:29.774000Z",
+                                "artwork_count": 3
+                            },
+                            {
+                                "id": 2,
+                                "title": "Vincent Namatjira",
+                                "sort_title": "Namatjira, Vincent",
+                                "birth_date": 1983,
+                                "death_date": 'null',
+                                "description": "An artist",
+                                "created_date": "2022-10-12T01:13:36.219000Z",
+                                "last_modified": "2022-10-12T02:43:04.347000Z",
+                                "artwork_count": 1
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all artists.')
+            200: OpenApiResponse(response=int, description='Returns a page of artists with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )
     def get(self, request, format=None):
         """
-        Return a list of all artists.
+        Return a page of artists with their `artwork_count`, ordered by last modification.
         """
         permission_classes = [permissions.AllowAny]
-        artists = Artist.objects.all()
+        try:
+            fields = sparse_fields(request, ArtistSerializer, extra=[ARTWORK_COUNT])
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        fields, with_count = split_artwork_count(fields)
+        artists = project(Artist.objects.all(), fields)
+        by_ids = ids_response(request, artists, ArtistSerializer, fields)
+        if by_ids is not None:
+            return by_ids
         title = request.GET.get('title', None)
         if title is not None:
             artists = artists.filter(title__icontains=title)
-        artists_serializer = ArtistSerializer(artists, many=True)
-        return Response(artists_serializer.data)
+        # The counts change with the artworks, so the ETag covers them as well.
+        validators = queryset_validators(request, artists, *([Artwork.objects.all()] if with_count else []))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        if wants_stream(request):
+            return validators.apply(stream_json(artists, ArtistSerializer, fields=fields))
+        paginator = KeysetPagination()
+        artists_serializer = values_serializer(ArtistSerializer, fields)
+        page = paginator.paginate_queryset(artists_serializer.values(artists), request, view=self)
+        results = artists_serializer.data(page)
+        if with_count:
+            add_artwork_counts(page, results)
+        return validators.apply(paginator.get_paginated_response(results))
 
     @extend_schema(
         examples=[
@@ -93,7 +156,8 @@ class ListArtists(APIView):
             )
         ],
         request={
-            'application/x-www-form-urlencoded': ArtistSerializer
+            'application/x-www-form-urlencoded': ArtistSerializer,
+            'application/json': ArtistSerializer(many=True)
         },
         responses={
             201: OpenApiResponse(response=int, description='Successful creation will return the input data.'),
@@ -105,10 +169,16 @@ class ListArtists(APIView):
         Add an artist to the list of all artists.
 
         * Only managers or staff can add artists
+        * A JSON array creates many artists at once, reporting errors for each item
         """
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'add new artists')
         if auth_denied is None:
-            artist_data = FormParser().parse(request)
+            if request.content_type.startswith('application/json'):
+                if is_bulk_request(request):
+                    return bulk_create_response(ArtistSerializer, request.data)
+                artist_data = request.data
+            else:
+                artist_data = FormParser().parse(request)
             artist_serializer = ArtistSerializer(data=artist_data)
             if artist_serializer.is_valid():
                 artist_serializer.save()
@@ -141,13 +211,14 @@ class ListArtistDetail(APIView):
     """
     View to list a single artist in the system.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only managers or staff can update an artist
     * Only managers can delete an artist
     """
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
 
     @extend_schema(
+        parameters=fieldset_parameters,
         examples=[
             OpenApiExample(
                 'Returned data for the requested artist.',
@@ -162,13 +233,15 @@ class ListArtistDetail(APIView):
                             "death_date": 'null',
                             "description": "An artist",
                             "created_date": "2022-10-12T01:13:36.219000Z",
-                            "last_modified": "2022-10-12T02:43:04.347000Z"
+                            "last_modified": "2022-10-12T02:43:04.347000Z",
+                            "artwork_count": 1
                         }
                     ],
             )
         ],
         responses={
             200: OpenApiResponse(response=int, description='Returns the requested artist.'),
+            304: OpenApiResponse(response=int, description='The artist has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
             404: OpenApiResponse(response=int, description='The given id does not match any artist is in the database.'),
         }
     )
@@ -178,11 +251,31 @@ class ListArtistDetail(APIView):
         """
         permission_classes = [permissions.AllowAny]
         try:
-            artist = Artist.objects.get(pk=pk)
+            fields = sparse_fields(request, ArtistSerializer, extra=[ARTWORK_COUNT])
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        fields, with_count = split_artwork_count(fields)
+        last_modified = last_modified_of(Artist, pk)
+        if last_modified is None:
+            return Response({'message': 'The artist does not exist'}, status=status.HTTP_404_NOT_FOUND)
+        if with_count:
+            artwork_count = Artwork.objects.filter(artist_id=pk).count()
+            # The count can change while the artist does not, so only the ETag,
+            # which covers it, is given and not Last-Modified.
+            validators = Validators(instance_validators(request, Artist, pk, last_modified, artwork_count).etag)
+        else:
+            validators = instance_validators(request, Artist, pk, last_modified)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        try:
+            artist = project(Artist.objects, fields).get(pk=pk)
         except Artist.DoesNotExist:
             return Response({'message': 'The artist does not exist'}, status=status.HTTP_404_NOT_FOUND)
-        artist_serializer = ArtistSerializer(artist)
-        return Response(artist_serializer.data)
+        artist_data = ArtistSerializer(artist, fields=fields).data
+        if with_count:
+            artist_data[ARTWORK_COUNT] = artwork_count
+        return validators.apply(Response(artist_data))
 
     @extend_schema(
         examples=[
@@ -263,4 +356,48 @@ class ListArtistDetail(APIView):
             artist.delete()
             return Response({'message': 'Artist was deleted.'}, status=status.HTTP_204_NO_CONTENT)
         else:
-            return auth_denied
\ No newline at end of file
+            return auth_denied
+
+
+class ListArtistArtworks(APIView):
+    """
+    View to list the artworks of a single artist, found by their `artist_id`.
+
+    * Requires basic or bearer token authentication.
+    * Only users are able to access this view.
+    """
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    @extend_schema(
+        parameters=[stream_parameter, *fieldset_parameters],
+        responses={
+            200: OpenApiResponse(response=int, description="Returns a page of the artist's artworks with cursors for the next and previous pages."),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.'),
+            404: OpenApiResponse(response=int, description='The given id does not match any artist is in the database.'),
+        }
+    )
+    def get(self, request, pk):
+        """
+        Return a page of an artist's artworks, ordered by last modification.
+        """
+        auth_denied = GroupPermissions.UsersOnly(request.user.role, "view an artist's artworks")
+        if auth_denied is None:
+            try:
+                fields = sparse_fields(request, ArtworkSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            if not Artist.objects.filter(pk=pk).exists():
+                return Response({'message': 'The artist does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            artworks = project(Artwork.objects.filter(artist_id=pk), fields)
+            validators = queryset_validators(request, artworks)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            if wants_stream(request):
+                return validators.apply(stream_json(artworks, ArtworkSerializer, fields=fields))
+            paginator = KeysetPagination()
+            artworks_serializer = values_serializer(ArtworkSerializer, fields)
+            page = paginator.paginate_queryset(artworks_serializer.values(artworks), request, view=self)
+            return validators.apply(paginator.get_paginated_response(artworks_serializer.data(page)))
+        else:
+            return auth_denied
@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0002_rename_artistid_artwork_artist_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['last_modified', 'id'], name='artwork_modified_idx'),
+        ),
+    ]
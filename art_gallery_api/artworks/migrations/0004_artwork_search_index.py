@@ -0,0 +1,29 @@
+from django.db import migrations
+from artgallery.search import create_search_index, drop_search_index
+
+# The weights the index is made with. Later changes need a migration of their own.
+WEIGHTS = {
+    'title': 10,
+    'artist_title': 5,
+    'medium_display': 2,
+    'provenance_text': 1,
+}
+
+
+def create_index(apps, schema_editor):
+    create_search_index(apps.get_model('artworks', 'Artwork'), WEIGHTS, schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(apps.get_model('artworks', 'Artwork'), schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0003_artwork_artwork_modified_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1 on 2026-10-16 21:12
+
+from django.db import migrations, models
+from artgallery import geo
+
+
+def fill_geohash(apps, schema_editor):
+    Artwork = apps.get_model('artworks', 'Artwork')
+    for pk, latitude, longitude in Artwork.objects.values_list('id', 'latitude', 'longitude').iterator():
+        Artwork.objects.filter(pk=pk).update(geohash=geo.encode(latitude, longitude))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0004_artwork_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1 on 2026-10-16 21:12
+
+from django.db import migrations, models
+
+
+def fill_date_interval(apps, schema_editor):
+    Artwork = apps.get_model('artworks', 'Artwork')
+    for pk, date_start, date_end in Artwork.objects.values_list('id', 'date_start', 'date_end').iterator():
+        date_until = date_end if date_end is not None else date_start
+        Artwork.objects.filter(pk=pk).update(
+            date_until=date_until,
+            date_span_bucket=max(date_until - date_start, 0).bit_length()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0005_artwork_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artwork',
+            name='date_span_bucket',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='date_until',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_date_interval, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['date_span_bucket', 'date_start', 'date_until'], name='artwork_interval_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['date_start', 'date_until'], name='artwork_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0006_artwork_date_interval'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['on_display', 'last_modified', 'id'], name='artwork_displayed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['artist_id', 'last_modified', 'id'], name='artwork_artist_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1 on 2026-10-16 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artwork',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='data/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='thumbnails',
+            field=models.CharField(blank=True, default='', editable=False, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='thumbnail_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', editable=False, max_length=10),
+        ),
+    ]
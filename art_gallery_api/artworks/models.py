@@ -1,4 +1,89 @@
 from django.db import models
+from django.db.models import Q
+from artgallery import geo
+
+
+# Creation intervals are grouped by length into buckets, where bucket n holds
+# intervals lasting between 2**(n-1) and 2**n - 1 years (bucket 0 holds single
+# years). This covers intervals of up to 65535 years.
+DATE_SPAN_BUCKETS = 17
+
+# Progress of the thumbnails made from an artwork's image, see `artgallery.thumbnails`.
+THUMBNAIL_STATUS_CHOICES = [('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')]
+
+
+class ArtworkQuerySet(models.QuerySet):
+    """
+    Spatial queries on artworks, answered from the indexed `geohash` field, and
+    date range queries, answered from the indexed creation interval fields.
+    """
+
+    def within_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Artworks inside a bounding box. Boxes crossing the antimeridian have
+        `min_lon > max_lon`.
+        """
+        cells = Q()
+        for prefix in sorted(geo.cover(min_lat, min_lon, max_lat, max_lon)):
+            cells |= Q(geohash__startswith=prefix)
+        if min_lon <= max_lon:
+            longitudes = Q(longitude__gte=min_lon, longitude__lte=max_lon)
+        else:
+            longitudes = Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon)
+        return self.filter(cells, longitudes, latitude__gte=min_lat, latitude__lte=max_lat)
+
+    def overlapping(self, start, end):
+        """
+        Artworks whose creation interval shares at least one year with `start`-`end`.
+
+        An interval overlaps when it starts by `end` and finishes from `start`. On its
+        own the first condition scans every earlier artwork, but inside a length
+        bucket an overlapping interval must also start within the bucket's maximum
+        length of `start`, so each bucket is a bounded range on the interval index.
+        """
+        buckets = Q()
+        for bucket in range(DATE_SPAN_BUCKETS):
+            longest = (1 << bucket) - 1
+            buckets |= Q(date_span_bucket=bucket, date_start__gte=start - longest, date_start__lte=end)
+        return self.filter(buckets, date_until__gte=start)
+
+    def within_dates(self, start, end):
+        """Artworks whose whole creation interval lies inside `start`-`end`."""
+        return self.filter(date_start__gte=start, date_start__lte=end, date_until__lte=end)
+
+    def nearest(self, latitude, longitude, k, radius_km=None):
+        """
+        Return a list of up to `k` artworks closest to a point, nearest first, each
+        with its `distance_km` set.
+
+        With a radius only artworks inside it are considered. Without one the search
+        starts from a small circle and widens it until `k` artworks are found.
+        Candidates are ranked from their coordinates alone, so only the `k` winners
+        are loaded in full.
+        """
+        radius = radius_km or 25.0
+        while True:
+            box = geo.bounding_box(latitude, longitude, radius)
+            candidates = self.within_box(*box).values_list('id', 'latitude', 'longitude')
+            ranked = sorted(
+                (distance, pk) for distance, pk in (
+                    (geo.distance_km(latitude, longitude, lat, lon), pk) for pk, lat, lon in candidates
+                ) if distance <= radius
+            )
+            if len(ranked) >= k or radius_km is not None or radius >= geo.EARTH_RADIUS_KM * 3.2:
+                break
+            radius *= 4
+
+        ranked = ranked[:k]
+        artworks = self.in_bulk([pk for distance, pk in ranked])
+        results = []
+        for distance, pk in ranked:
+            artwork = artworks.get(pk)
+            if artwork is not None:
+                artwork.distance_km = distance
+                results.append(artwork)
+        return results
+
 
 class Artwork(models.Model):
     """
@@ -6,9 +91,13 @@ class Artwork(models.Model):
     """
     title = models.CharField(max_length=200, blank=False)
     image = models.ImageField(upload_to='data/images/', blank=False)
-    thumbnail = models.ImageField(upload_to='data/thumbnails/', blank=False)
+    thumbnail = models.ImageField(upload_to='data/thumbnails/', blank=True)
+    thumbnails = models.CharField(max_length=1000, blank=True, default='', editable=False)
+    thumbnail_status = models.CharField(max_length=10, choices=THUMBNAIL_STATUS_CHOICES, default='pending', editable=False)
     date_start = models.IntegerField(blank=False)
     date_end = models.IntegerField(null = True, blank=True)
+    date_until = models.IntegerField(null=True, editable=False)
+    date_span_bucket = models.IntegerField(null=True, editable=False)
     place_of_origin = models.CharField(max_length=100, blank=False)
     dimensions = models.CharField(max_length=100, blank=False)
     medium_display = models.CharField(max_length=100, blank=False)
@@ -16,6 +105,7 @@ class Artwork(models.Model):
     is_public_domain = models.BooleanField(blank=False, default=False)
     latitude = models.FloatField(blank=False)
     longitude = models.FloatField(blank=False)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False, db_index=True)
     department = models.CharField(max_length=80, blank=False)
     artist_id = models.IntegerField(blank=False)
     artist_title = models.CharField(max_length=200, blank=False)
@@ -23,6 +113,35 @@ class Artwork(models.Model):
     last_modified = models.DateTimeField(auto_now=True, blank=False, editable=False)
     on_display = models.BooleanField(blank=False,default=False)
 
+    objects = ArtworkQuerySet.as_manager()
+
+    # Fields computed from the others by `set_derived_fields`, kept only for indexing.
+    derived_fields = ['geohash', 'date_until', 'date_span_bucket']
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified', 'id'], name='artwork_modified_idx'),
+            models.Index(fields=['on_display', 'last_modified', 'id'], name='artwork_displayed_idx'),
+            models.Index(fields=['artist_id', 'last_modified', 'id'], name='artwork_artist_idx'),
+            models.Index(fields=['date_span_bucket', 'date_start', 'date_until'], name='artwork_interval_idx'),
+            models.Index(fields=['date_start', 'date_until'], name='artwork_dates_idx'),
+        ]
+
     def __str__(self):
         """ The representation that is visible in the admin """
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def set_derived_fields(self):
+        """
+        Recompute the indexed fields derived from the others. `save` calls this, but
+        anything that writes without `save`, such as `bulk_create`, must call it first.
+        """
+        self.geohash = geo.encode(self.latitude, self.longitude)
+        self.date_until = self.date_end if self.date_end is not None else self.date_start
+        self.date_span_bucket = max(self.date_until - self.date_start, 0).bit_length()
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *self.derived_fields}
+        super().save(*args, **kwargs)
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from artgallery.fieldsets import SparseFieldsMixin
+from artgallery.thumbnails import ThumbnailsField
 from artworks.models import Artwork
 
-class ArtworkSerializer(serializers.ModelSerializer):
+class ArtworkSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    thumbnails = ThumbnailsField(Artwork._meta.get_field('thumbnail').storage)
 
     class Meta:
         model = Artwork
@@ -10,6 +13,8 @@ class ArtworkSerializer(serializers.ModelSerializer):
             'title',
             'image',
             'thumbnail',
+            'thumbnails',
+            'thumbnail_status',
             'date_start',
             'date_end',
             'place_of_origin',
@@ -4,5 +4,7 @@ from artworks import views
 urlpatterns = [
     re_path(r'api/artworks$', views.ListArtworks.as_view()),
     re_path(r'api/artworks/(?P<pk>[0-9]+)$', views.ListArtworkDetail.as_view()),
-    re_path(r'api/artworks/displayed$', views.ListDisplayedArtworks.as_view())
+    re_path(r'api/artworks/(?P<pk>[0-9]+)/image$', views.ArtworkImage.as_view()),
+    re_path(r'api/artworks/displayed$', views.ListDisplayedArtworks.as_view()),
+    re_path(r'api/artworks/facets$', views.ArtworkFacets.as_view()),
 ]
\ No newline at end of file
@@ -1,12 +1,26 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 from rest_framework import serializers
+from artgallery.authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from artgallery.batch import ids_parameter, ids_response
+from artgallery.bulk import bulk_create_response, bulk_update_response, is_bulk_request, is_stored_under
+from artgallery.cache import FeedCache
+from artgallery import geo, images, thumbnails
+from artgallery.facets import facet_counts, facet_match
+from artgallery.conditional import instance_validators, last_modified_of, queryset_validators
+from artgallery.fieldsets import fieldset_parameters, project, sparse_fields
 from artgallery.groups import GroupPermissions
+from artgallery.pagination import KeysetPagination
+from artgallery.streaming import stream_json, stream_parameter, wants_stream
+from artgallery.values import values_serializer
 from django.db import DatabaseError
+from django.http import FileResponse
+from django.utils.cache import patch_vary_headers
 from rest_framework.permissions import AllowAny
-from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, inline_serializer, OpenApiResponse
+from PIL import Image, UnidentifiedImageError
 from artworks.models import Artwork
 from artworks.serializers import ArtworkSerializer
 
@@ -15,83 +29,155 @@ class ListArtworks(APIView):
     """
     View to list all artworks in the system from model: `artworks.Artworks`.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only users with accounts can view all artworks
     * Only staff and managers are able to update or create artworks.
     * Only managers can delete artworks
     """
     
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    max_nearest = 500
+    # Fields that a bulk PATCH may change, and fields it may filter on. Fields that
+    # `Artwork.save` derives others from are left out, since `update()` skips it.
+    bulk_update_fields = ['title', 'place_of_origin', 'dimensions', 'medium_display', 'provenance_text',
+                          'is_public_domain', 'department', 'artist_id', 'artist_title', 'on_display']
+    bulk_filter_fields = ['on_display', 'department', 'artist_id', 'is_public_domain', 'place_of_origin']
     
     @extend_schema(
+        parameters=[
+            stream_parameter,
+            ids_parameter,
+            *fieldset_parameters,
+            OpenApiParameter('bbox', str, description='Only artworks inside the box min_lon,min_lat,max_lon,max_lat.'),
+            OpenApiParameter('near', str, description='A point lat,lon. Returns the artworks nearest to it, closest first, instead of a page.'),
+            OpenApiParameter('radius', float, description='With near, only artworks within this many kilometres.'),
+            OpenApiParameter('k', int, description='With near, the number of artworks to return, up to 500. Defaults to 20.'),
+            OpenApiParameter('overlaps', str, description='Only artworks created at some point between the years start,end.'),
+            OpenApiParameter('within', str, description='Only artworks created entirely between the years start,end.'),
+        ],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "title": "Something More #1",
-                            "image": "/data/images/image1.png",
-                            "thumbnail": "/data/thumbnails/image1thumb.png",
-                            "date_start": 1989,
-                            "date_end": 1989,
-                            "place_of_origin": "Albury",
-                            "dimensions": "frame 111 x 141 x 3.2cm",
-                            "medium_display": "cibachrome print, framed",
-                            "provenance_text": "The nine images in Something More tell an ambiguous tale of a young woman's longing for 'something more', a quest which brings dashed hopes and the loss of innocence. With its staged theatricality and storyboard framing, the series has been described by critic Ingrid Perez as 'a collection of scenes from a film that was never made'. While the film may never have been made, we recognise its components from a shared cultural memory of B-grade cinema and pulp fiction, from which Moffatt has drawn this melodrama. The 'scenes' can be displayed in any order - in pairs, rows or as a grid - and so their storyline is not fixed, although we piece together the arc from naïve country girl to fallen woman abandoned on the roadside in whatever arrangement they take. Moffatt capitalises on the cinematic device of montage, mixing together continuous narrative, flashbacks, cutaways, close-ups and memory or dream sequences, to structure the series, and relies on our knowledge of these devices to make sense and meaning out of the assemblage. Something More was made while Moffatt was artist-in-residence at Albury Regional Art Centre in May 1989, and was produced in conjunction with staff and students of the photography department at the Centre for Visual Arts Murray Campus of Charles Sturt University, the artists of the Link Access studio and the general community of Albury Wodonga. Moffatt 'stars' as the beautiful ingénue in the cheongsam, and conjures the stifling atmosphere of small-town life in the cane fields of her native Queensland through vividly painted sets. The pantomime feeling of the series is amplified by the stereotypical characters of the trashy blonde and the Chinese boy-next-door who feature alongside her, and the lush colour saturation of the Cibachrome images. Something More is the first of Moffatt's photographic series which demonstrates all of the elements that have made her work so acclaimed: its theatrical staginess, its references to film, art and photographic history and issues of race and gender.",
-                            "is_public_domain": False,
-                            "latitude": -33.859964214346284,
-                            "longitude": 151.20910207195533,
-                            "department": "Photography",
-                            "artist_id": 1,
-                            "artist_title": "Tracey Moffatt",
-                            "created_date": "2022-10-12T03:10:30.191000Z",
-                            "last_modified": "2022-10-13T02:14:47.212000Z",
-                            "on_display": True
-                        },
-                        {
-                            "id": 2,
-                            "title": "The Royal Tour 16, 2020",
-                            "image": "/data/images/image1_MYUuImU.png",
-                            "thumbnail": "/data/thumbnails/image1thumb_VuP4GiM.png",
-                            "date_start": 2020,
-                            "date_end": 2020,
-                            "place_of_origin": "Alice Springs",
-                            "dimensions": "frame 43.3 x 53.1cm",
-                            "medium_display": "acrylic on found book pages, framed",
-                            "provenance_text": "Vincent Namatjira sourced the material for The Royal Tour from op-shops in Alice Springs, Northern Territory. During the lockdowns for remote community members in the Northern Territory as a result of the COVID-19 pandemic, he was unable to work in his studio. He devised the idea of working directly onto the pages of the found source material, which included magazines, books and other mass-produced paper works featuring the British royal family. This meant he was able to paint at a domestic size, at home in isolation. The artist states that whenever he paints powerful figures - politicians, world leaders or members of the royal family, for example - he is attempting to disrupt or take away their power. He often does this by placing the figures on Aboriginal land, out of their comfort zone, where they are not considered leaders but are viewed as just another visitor. He will also often place himself in the work, in “a mischievous self-portrait, using a bit of cheeky humour kind of as an equaliser - to put everyone on the same level.”[1]  There are some synchronicities with the British monarchy and the Namatjira family. While researching the Namatjira family history, Vincent came to learn that his great-grandfather, the renowned artist Albert Namatjira (1902-1959) had met Queen Elizabeth II when she toured Australia in 1954. It was at this time that he had bestowed upon him the Coronation Medal, a commemorative personal souvenir awarded by the Queen to particularly noteworthy Commonwealth subjects. The British royal family and the Coronation Medal are seen by the artist as symbolic of wealth and power, able to bestow social validation upon those who were considered part of the lower echelons of society. The background of several works in The Royal Tour have been painted in a stylistically similar way tothe work of the artist's great-grandfather. It's a sincere homage to Albert Namatjira's artistic technique, which we now know revealed connections to his custodial Country. The washed, confidently depicted backdrops are also a tribute to the artists - many of whom are related to Vincent Namatjira - at the Iltja Ntjarra (Many Hands) Art Centre, who continue the artistic legacy of Albert Namatjira in their depictions of Country. Vincent's Namatjira's work can be contextualised within a broader artistic framework of humorous political representations in Australian contemporary art. Similar to newspaper cartoons with their leaning towards political satire, his work effortlessly captures a particular generational critique of those who have felt marginalised from the possibility of participating in or influencing sovereignty over their own lives.",
-                            "is_public_domain": False,
-                            "latitude": -33.859964214346284,
-                            "longitude": 151.20910207195533,
-                            "department": "Painting",
-                            "artist_id": 2,
-                            "artist_title": "Vincent Namatjira",
-                            "created_date": "2022-10-12T03:59:35.243000Z",
-                            "last_modified": "2022-10-12T03:59:35.243000Z",
-                            "on_display": True
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "Something More #1",
+                                "image": "/data/images/image1.png",
+                                "thumbnail": "/data/thumbnails/image1thumb.png",
+                                "date_start": 1989,
+                                "date_end": 1989,
+                                "place_of_origin": "Albury",
+                                "dimensions": "frame 111 x 141 x 3.2cm",
+                                "medium_display": "cibachrome print, framed",
+                                "provenance_text": "The nine images in Something More tell an ambiguous tale of a young woman's longing for 'something more', a quest which brings dashed hopes and the loss of innocence. With its staged theatricality and storyboard framing, the series has been described by critic Ingrid Perez as 'a collection of scenes from a film that was never made'. While the film may never have been made, we recognise its components from a shared cultural memory of B-grade cinema and pulp fiction, from which Moffatt has drawn this melodrama. The 'scenes' can be displayed in any order - in pairs, rows or as a grid - and so their storyline is not fixed, although we piece together the arc from naïve country girl to fallen woman abandoned on the roadside in whatever arrangement they take. Moffatt capitalises on the cinematic device of montage, mixing together continuous narrative, flashbacks, cutaways, close-ups and memory or dream sequences, to structure the series, and relies on our knowledge of these devices to make sense and meaning out of the assemblage. Something More was made while Moffatt was artist-in-residence at Albury Regional Art Centre in May 1989, and was produced in conjunction with staff and students of the photography department at the Centre for Visual Arts Murray Campus of Charles Sturt University, the artists of the Link Access studio and the general community of Albury Wodonga. Moffatt 'stars' as the beautiful ingénue in the cheongsam, and conjures the stifling atmosphere of small-town life in the cane fields of her native Queensland through vividly painted sets. The pantomime feeling of the series is amplified by the stereotypical characters of the trashy blonde and the Chinese boy-next-door who feature alongside her, and the lush colour saturation of the Cibachrome images. Something More is the first of Moffatt's photographic series which demonstrates all of the elements that have made her work so acclaimed: its theatrical staginess, its references to film, art and photographic history and issues of race and gender.",
+                                "is_public_domain": False,
+                                "latitude": -33.859964214346284,
+                                "longitude": 151.20910207195533,
+                                "department": "Photography",
+                                "artist_id": 1,
+                                "artist_title": "Tracey Moffatt",
+                                "created_date": "2022-10-12T03:10:30.191000Z",
+                                "last_modified": "2022-10-13T02:14:47.212000Z",
+                                "on_display": True
+                            },
+                            {
+                                "id": 2,
+                                "title": "The Royal Tour 16, 2020",
+                                "image": "/data/images/image1_MYUuImU.png",
+                                "thumbnail": "/data/thumbnails/image1thumb_VuP4GiM.png",
+                                "date_start": 2020,
+                                "date_end": 2020,
+                                "place_of_origin": "Alice Springs",
+                                "dimensions": "frame 43.3 x 53.1cm",
+                                "medium_display": "acrylic on found book pages, framed",
+                                "provenance_text": "Vincent Namatjira sourced the material for The Royal Tour from op-shops in Alice Springs, Northern Territory. During the lockdowns for remote community members in the Northern Territory as a result of the COVID-19 pandemic, he was unable to work in his studio. He devised the idea of working directly onto the pages of the found source material, which included magazines, books and other mass-produced paper works featuring the British royal family. This meant he was able to paint at a domestic size, at home in isolation. The artist states that whenever he paints powerful figures - politicians, world leaders or members of the royal family, for example - he is attempting to disrupt or take away their power. He often does this by placing the figures on Aboriginal land, out of their comfort zone, where they are not considered leaders but are viewed as just another visitor. He will also often place himself in the work, in “a mischievous self-portrait, using a bit of cheeky humour kind of as an equaliser - to put everyone on the same level.”[1]  There are some synchronicities with the British monarchy and the Namatjira family. While researching the Namatjira family history, Vincent came to learn that his great-grandfather, the renowned artist Albert Namatjira (1902-1959) had met Queen Elizabeth II when she toured Australia in 1954. It was at this time that he had bestowed upon him the Coronation Medal, a commemorative personal souvenir awarded by the Queen to particularly noteworthy Commonwealth subjects. The British royal family and the Coronation Medal are seen by the artist as symbolic of wealth and power, able to bestow social validation upon those who were considered part of the lower echelons of society. The background of several works in The Royal Tour have been painted in a stylistically similar way tothe work of the artist's great-grandfather. It's a sincere homage to Albert Namatjira's artistic technique, which we now know revealed connections to his custodial Country. The washed, confidently depicted backdrops are also a tribute to the artists - many of whom are related to Vincent Namatjira - at the Iltja Ntjarra (Many Hands) Art Centre, who continue the artistic legacy of Albert Namatjira in their depictions of Country. Vincent's Namatjira's work can be contextualised within a broader artistic framework of humorous political representations in Australian contemporary art. Similar to newspaper cartoons with their leaning towards political satire, his work effortlessly captures a particular generational critique of those who have felt marginalised from the possibility of participating in or influencing sovereignty over their own lives.",
+                                "is_public_domain": False,
+                                "latitude": -33.859964214346284,
+                                "longitude": 151.20910207195533,
+                                "department": "Painting",
+                                "artist_id": 2,
+                                "artist_title": "Vincent Namatjira",
+                                "created_date": "2022-10-12T03:59:35.243000Z",
+                                "last_modified": "2022-10-12T03:59:35.243000Z",
+                                "on_display": True
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all artworks.')
+            200: OpenApiResponse(response=int, description='Returns a page of artworks with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )
     def get(self, request, format=None):
         """
-        Return a list of all artworks.
+        Return a page of artworks, ordered by last modification.
         * Only users are able to access this view.
+        * `near` returns the nearest artworks with their `distance_km` instead.
         """
         auth_denied = GroupPermissions.UsersOnly(request.user.role, 'view all artworks')
         if auth_denied is None:
-            artworks = Artwork.objects.all()
+            try:
+                fields = sparse_fields(request, ArtworkSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            artworks = project(Artwork.objects.all(), fields)
+            by_ids = ids_response(request, artworks, ArtworkSerializer, fields)
+            if by_ids is not None:
+                return by_ids
             title = request.GET.get('title', None)
             if title is not None:
                 artworks = artworks.filter(title__icontains=title)
-            artworks_serializer = ArtworkSerializer(artworks, many=True)
-            return Response(artworks_serializer.data)
+            bbox = request.GET.get('bbox', None)
+            if bbox is not None:
+                try:
+                    min_lon, min_lat, max_lon, max_lat = geo.parse_floats(bbox, 4)
+                    geo.check_point(min_lat, min_lon)
+                    geo.check_point(max_lat, max_lon)
+                except ValueError:
+                    return Response({'message': 'bbox must be min_lon,min_lat,max_lon,max_lat in degrees'}, status=status.HTTP_400_BAD_REQUEST)
+                artworks = artworks.within_box(min_lat, min_lon, max_lat, max_lon)
+            for name, date_filter in (('overlaps', 'overlapping'), ('within', 'within_dates')):
+                years = request.GET.get(name, None)
+                if years is not None:
+                    try:
+                        start, end = [int(year) for year in years.split(',')]
+                    except ValueError:
+                        return Response({'message': name + ' must be two years, start,end'}, status=status.HTTP_400_BAD_REQUEST)
+                    artworks = getattr(artworks, date_filter)(min(start, end), max(start, end))
+            validators = queryset_validators(request, artworks)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            near = request.GET.get('near', None)
+            if near is not None:
+                try:
+                    latitude, longitude = geo.parse_floats(near, 2)
+                    geo.check_point(latitude, longitude)
+                    radius = request.GET.get('radius', None)
+                    radius = float(radius) if radius is not None else None
+                    k = min(int(request.GET.get('k', 20)), self.max_nearest)
+                except ValueError:
+                    return Response({'message': 'near must be lat,lon in degrees, with a numeric radius and k'}, status=status.HTTP_400_BAD_REQUEST)
+                if k < 1 or (radius is not None and radius <= 0):
+                    return Response({'message': 'radius and k must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+                nearest = artworks.nearest(latitude, longitude, k, radius)
+                artworks_serializer = ArtworkSerializer(nearest, many=True, fields=fields)
+                for item, artwork in zip(artworks_serializer.data, nearest):
+                    item['distance_km'] = artwork.distance_km
+                return validators.apply(Response({'results': artworks_serializer.data}))
+            if wants_stream(request):
+                return validators.apply(stream_json(artworks, ArtworkSerializer, fields=fields))
+            paginator = KeysetPagination()
+            artworks_serializer = values_serializer(ArtworkSerializer, fields)
+            page = paginator.paginate_queryset(artworks_serializer.values(artworks), request, view=self)
+            return validators.apply(paginator.get_paginated_response(artworks_serializer.data(page)))
         else:
             return auth_denied
 
@@ -138,7 +224,8 @@ class ListArtworks(APIView):
             )
         ],
         request={
-            'multipart/form-data': ArtworkSerializer
+            'multipart/form-data': ArtworkSerializer,
+            'application/json': ArtworkSerializer(many=True)
         },
         responses={
             201: OpenApiResponse(response=int, description='Successful creation will return the input data.'),
@@ -150,18 +237,78 @@ class ListArtworks(APIView):
         Add an artwork to the list of all artworks.
 
         * Only managers or staff can add artworks
+        * Thumbnails are made from the image in the background, see `thumbnail_status`
+        * A JSON array creates many artworks at once, reporting errors for each item
         """
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'add new artworks')
         if auth_denied is None:
+            if is_bulk_request(request):
+                return bulk_create_response(ArtworkSerializer, request.data)
             artwork_serializer = ArtworkSerializer(data=request.data)
             if artwork_serializer.is_valid():
-                artwork_serializer.save()
+                artwork = artwork_serializer.save()
+                thumbnails.pool.schedule(Artwork, artwork.pk)
                 return Response(artwork_serializer.data, status=status.HTTP_201_CREATED)
             else:
                 return Response(artwork_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         else:
             return auth_denied
 
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Take a gallery off display',
+                request_only=True,
+                value =
+                {
+                    "filter": {"department": "Photography", "on_display": True},
+                    "set": {"on_display": False}
+                },
+            ),
+            OpenApiExample(
+                'Hang a list of artworks',
+                request_only=True,
+                value =
+                {
+                    "ids": [1, 2, 5],
+                    "set": {"on_display": True}
+                },
+            ),
+            OpenApiExample(
+                'Successful update',
+                status_codes=['200'],
+                value =
+                {
+                    "updated": 3
+                },
+            )
+        ],
+        request=inline_serializer(
+            name='ArtworkBulkUpdate',
+            fields={
+                'ids': serializers.ListField(child=serializers.IntegerField(), required=False),
+                'filter': serializers.DictField(required=False),
+                'set': serializers.DictField(),
+            }
+        ),
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the number of artworks updated.'),
+            400: OpenApiResponse(response=int, description='Invalid ids, filter or changes, with details.'),
+        }
+    )
+    def patch(self, request, format=None):
+        """
+        Change the same fields on many artworks at once, chosen by id or by filter.
+
+        * Only managers or staff can update artworks
+        * Images, locations and dates cannot be changed this way
+        """
+        auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'update artworks')
+        if auth_denied is None:
+            return bulk_update_response(ArtworkSerializer, request.data, self.bulk_update_fields, self.bulk_filter_fields)
+        else:
+            return auth_denied
+
     @extend_schema( 
         responses={
             204: OpenApiResponse(response=int, description='Returns nothing on successful deletion.')
@@ -185,15 +332,16 @@ class ListArtworkDetail(APIView):
     """
     View to list a single artwork in the system.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only users with accounts can view artworks
     * Only managers or staff can update an artwork
     * Only managers can delete an artwork
     """
     
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
 
     @extend_schema(
+        parameters=fieldset_parameters,
         examples=[
             OpenApiExample(
                 'Returned data for the requested artwork.',
@@ -226,6 +374,7 @@ class ListArtworkDetail(APIView):
         ],
         responses={
             200: OpenApiResponse(response=int, description='Returns the requested artwork.'),
+            304: OpenApiResponse(response=int, description='The artwork has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
             404: OpenApiResponse(response=int, description='The given id does not match any artwork is in the database.'),
         }
     )    
@@ -236,11 +385,22 @@ class ListArtworkDetail(APIView):
         auth_denied = GroupPermissions.UsersOnly(request.user.role, 'view all artworks')
         if auth_denied is None:
             try:
-                artwork = Artwork.objects.get(pk=pk)
+                fields = sparse_fields(request, ArtworkSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            last_modified = last_modified_of(Artwork, pk)
+            if last_modified is None:
+                return Response({'message': 'The artwork does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            validators = instance_validators(request, Artwork, pk, last_modified)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            try:
+                artwork = project(Artwork.objects, fields).get(pk=pk)
             except Artwork.DoesNotExist:
                 return Response({'message': 'The artwork does not exist'}, status=status.HTTP_404_NOT_FOUND)
-            artwork_serializer = ArtworkSerializer(artwork)
-            return Response(artwork_serializer.data)
+            artwork_serializer = ArtworkSerializer(artwork, fields=fields)
+            return validators.apply(Response(artwork_serializer.data))
         else:
             return auth_denied
     
@@ -306,7 +466,11 @@ class ListArtworkDetail(APIView):
                 return Response({'message': 'The artwork does not exist'}, status=status.HTTP_404_NOT_FOUND)
             artwork_serializer = ArtworkSerializer(artwork, data = request.data, partial=True)
             if artwork_serializer.is_valid():
-                artwork_serializer.save()
+                if 'image' in artwork_serializer.validated_data:
+                    artwork_serializer.save(thumbnail_status=thumbnails.PENDING)
+                    thumbnails.pool.schedule(Artwork, artwork.pk)
+                else:
+                    artwork_serializer.save()
                 return Response(artwork_serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(artwork_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -341,69 +505,220 @@ class ListDisplayedArtworks(APIView):
     View to list the artworks that are currrently on display.
 
     * Allows anonymous access
+    * Rendered pages are cached until an artwork changes
     """
     permission_classes = [AllowAny]
+    feed_cache = FeedCache(Artwork)
     
     @extend_schema(
+        parameters=[stream_parameter, *fieldset_parameters],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "title": "Something More #1",
-                            "image": "/data/images/image1.png",
-                            "thumbnail": "/data/thumbnails/image1thumb.png",
-                            "date_start": 1989,
-                            "date_end": 1989,
-                            "place_of_origin": "Albury",
-                            "dimensions": "frame 111 x 141 x 3.2cm",
-                            "medium_display": "cibachrome print, framed",
-                            "provenance_text": "The nine images in Something More tell an ambiguous tale of a young woman's longing for 'something more', a quest which brings dashed hopes and the loss of innocence. With its staged theatricality and storyboard framing, the series has been described by critic Ingrid Perez as 'a collection of scenes from a film that was never made'. While the film may never have been made, we recognise its components from a shared cultural memory of B-grade cinema and pulp fiction, from which Moffatt has drawn this melodrama. The 'scenes' can be displayed in any order - in pairs, rows or as a grid - and so their storyline is not fixed, although we piece together the arc from naïve country girl to fallen woman abandoned on the roadside in whatever arrangement they take. Moffatt capitalises on the cinematic device of montage, mixing together continuous narrative, flashbacks, cutaways, close-ups and memory or dream sequences, to structure the series, and relies on our knowledge of these devices to make sense and meaning out of the assemblage. Something More was made while Moffatt was artist-in-residence at Albury Regional Art Centre in May 1989, and was produced in conjunction with staff and students of the photography department at the Centre for Visual Arts Murray Campus of Charles Sturt University, the artists of the Link Access studio and the general community of Albury Wodonga. Moffatt 'stars' as the beautiful ingénue in the cheongsam, and conjures the stifling atmosphere of small-town life in the cane fields of her native Queensland through vividly painted sets. The pantomime feeling of the series is amplified by the stereotypical characters of the trashy blonde and the Chinese boy-next-door who feature alongside her, and the lush colour saturation of the Cibachrome images. Something More is the first of Moffatt's photographic series which demonstrates all of the elements that have made her work so acclaimed: its theatrical staginess, its references to film, art and photographic history and issues of race and gender.",
-                            "is_public_domain": False,
-                            "latitude": -33.859964214346284,
-                            "longitude": 151.20910207195533,
-                            "department": "Photography",
-                            "artist_id": 1,
-                            "artist_title": "Tracey Moffatt",
-                            "created_date": "2022-10-12T03:10:30.191000Z",
-                            "last_modified": "2022-10-13T02:14:47.212000Z",
-                            "on_display": True
-                        },
-                        {
-                            "id": 2,
-                            "title": "The Royal Tour 16, 2020",
-                            "image": "/data/images/image1_MYUuImU.png",
-                            "thumbnail": "/data/thumbnails/image1thumb_VuP4GiM.png",
-                            "date_start": 2020,
-                            "date_end": 2020,
-                            "place_of_origin": "Alice Springs",
-                            "dimensions": "frame 43.3 x 53.1cm",
-                            "medium_display": "acrylic on found book pages, framed",
-                            "provenance_text": "Vincent Namatjira sourced the material for The Royal Tour from op-shops in Alice Springs, Northern Territory. During the lockdowns for remote community members in the Northern Territory as a result of the COVID-19 pandemic, he was unable to work in his studio. He devised the idea of working directly onto the pages of the found source material, which included magazines, books and other mass-produced paper works featuring the British royal family. This meant he was able to paint at a domestic size, at home in isolation. The artist states that whenever he paints powerful figures - politicians, world leaders or members of the royal family, for example - he is attempting to disrupt or take away their power. He often does this by placing the figures on Aboriginal land, out of their comfort zone, where they are not considered leaders but are viewed as just another visitor. He will also often place himself in the work, in “a mischievous self-portrait, using a bit of cheeky humour kind of as an equaliser - to put everyone on the same level.”[1]  There are some synchronicities with the British monarchy and the Namatjira family. While researching the Namatjira family history, Vincent came to learn that his great-grandfather, the renowned artist Albert Namatjira (1902-1959) had met Queen Elizabeth II when she toured Australia in 1954. It was at this time that he had bestowed upon him the Coronation Medal, a commemorative personal souvenir awarded by the Queen to particularly noteworthy Commonwealth subjects. The British royal family and the Coronation Medal are seen by the artist as symbolic of wealth and power, able to bestow social validation upon those who were considered part of the lower echelons of society. The background of several works in The Royal Tour have been painted in a stylistically similar way tothe work of the artist's great-grandfather. It's a sincere homage to Albert Namatjira's artistic technique, which we now know revealed connections to his custodial Country. The washed, confidently depicted backdrops are also a tribute to the artists - many of whom are related to Vincent Namatjira - at the Iltja Ntjarra (Many Hands) Art Centre, who continue the artistic legacy of Albert Namatjira in their depictions of Country. Vincent's Namatjira's work can be contextualised within a broader artistic framework of humorous political representations in Australian contemporary art. Similar to newspaper cartoons with their leaning towards political satire, his work effortlessly captures a particular generational critique of those who have felt marginalised from the possibility of participating in or influencing sovereignty over their own lives.",
-                            "is_public_domain": False,
-                            "latitude": -33.859964214346284,
-                            "longitude": 151.20910207195533,
-                            "department": "Painting",
-                            "artist_id": 2,
-                            "artist_title": "Vincent Namatjira",
-                            "created_date": "2022-10-12T03:59:35.243000Z",
-                            "last_modified": "2022-10-12T03:59:35.243000Z",
-                            "on_display": True
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "Something More #1",
+                                "image": "/data/images/image1.png",
+                                "thumbnail": "/data/thumbnails/image1thumb.png",
+                                "date_start": 1989,
+                                "date_end": 1989,
+                                "place_of_origin": "Albury",
+                                "dimensions": "frame 111 x 141 x 3.2cm",
+                                "medium_display": "cibachrome print, framed",
+                                "provenance_text": "The nine images in Something More tell an ambiguous tale of a young woman's longing for 'something more', a quest which brings dashed hopes and the loss of innocence. With its staged theatricality and storyboard framing, the series has been described by critic Ingrid Perez as 'a collection of scenes from a film that was never made'. While the film may never have been made, we recognise its components from a shared cultural memory of B-grade cinema and pulp fiction, from which Moffatt has drawn this melodrama. The 'scenes' can be displayed in any order - in pairs, rows or as a grid - and so their storyline is not fixed, although we piece together the arc from naïve country girl to fallen woman abandoned on the roadside in whatever arrangement they take. Moffatt capitalises on the cinematic device of montage, mixing together continuous narrative, flashbacks, cutaways, close-ups and memory or dream sequences, to structure the series, and relies on our knowledge of these devices to make sense and meaning out of the assemblage. Something More was made while Moffatt was artist-in-residence at Albury Regional Art Centre in May 1989, and was produced in conjunction with staff and students of the photography department at the Centre for Visual Arts Murray Campus of Charles Sturt University, the artists of the Link Access studio and the general community of Albury Wodonga. Moffatt 'stars' as the beautiful ingénue in the cheongsam, and conjures the stifling atmosphere of small-town life in the cane fields of her native Queensland through vividly painted sets. The pantomime feeling of the series is amplified by the stereotypical characters of the trashy blonde and the Chinese boy-next-door who feature alongside her, and the lush colour saturation of the Cibachrome images. Something More is the first of Moffatt's photographic series which demonstrates all of the elements that have made her work so acclaimed: its theatrical staginess, its references to film, art and photographic history and issues of race and gender.",
+                                "is_public_domain": False,
+                                "latitude": -33.859964214346284,
+                                "longitude": 151.20910207195533,
+                                "department": "Photography",
+                                "artist_id": 1,
+                                "artist_title": "Tracey Moffatt",
+                                "created_date": "2022-10-12T03:10:30.191000Z",
+                                "last_modified": "2022-10-13T02:14:47.212000Z",
+                                "on_display": True
+                            },
+                            {
+                                "id": 2,
+                                "title": "The Royal Tour 16, 2020",
+                                "image": "/data/images/image1_MYUuImU.png",
+                                "thumbnail": "/data/thumbnails/image1thumb_VuP4GiM.png",
+                                "date_start": 2020,
+                                "date_end": 2020,
+                                "place_of_origin": "Alice Springs",
+                                "dimensions": "frame 43.3 x 53.1cm",
+                                "medium_display": "acrylic on found book pages, framed",
+                                "provenance_text": "Vincent Namatjira sourced the material for The Royal Tour from op-shops in Alice Springs, Northern Territory. During the lockdowns for remote community members in the Northern Territory as a result of the COVID-19 pandemic, he was unable to work in his studio. He devised the idea of working directly onto the pages of the found source material, which included magazines, books and other mass-produced paper works featuring the British royal family. This meant he was able to paint at a domestic size, at home in isolation. The artist states that whenever he paints powerful figures - politicians, world leaders or members of the royal family, for example - he is attempting to disrupt or take away their power. He often does this by placing the figures on Aboriginal land, out of their comfort zone, where they are not considered leaders but are viewed as just another visitor. He will also often place himself in the work, in “a mischievous self-portrait, using a bit of cheeky humour kind of as an equaliser - to put everyone on the same level.”[1]  There are some synchronicities with the British monarchy and the Namatjira family. While researching the Namatjira family history, Vincent came to learn that his great-grandfather, the renowned artist Albert Namatjira (1902-1959) had met Queen Elizabeth II when she toured Australia in 1954. It was at this time that he had bestowed upon him the Coronation Medal, a commemorative personal souvenir awarded by the Queen to particularly noteworthy Commonwealth subjects. The British royal family and the Coronation Medal are seen by the artist as symbolic of wealth and power, able to bestow social validation upon those who were considered part of the lower echelons of society. The background of several works in The Royal Tour have been painted in a stylistically similar way tothe work of the artist's great-grandfather. It's a sincere homage to Albert Namatjira's artistic technique, which we now know revealed connections to his custodial Country. The washed, confidently depicted backdrops are also a tribute to the artists - many of whom are related to Vincent Namatjira - at the Iltja Ntjarra (Many Hands) Art Centre, who continue the artistic legacy of Albert Namatjira in their depictions of Country. Vincent's Namatjira's work can be contextualised within a broader artistic framework of humorous political representations in Australian contemporary art. Similar to newspaper cartoons with their leaning towards political satire, his work effortlessly captures a particular generational critique of those who have felt marginalised from the possibility of participating in or influencing sovereignty over their own lives.",
+                                "is_public_domain": False,
+                                "latitude": -33.859964214346284,
+                                "longitude": 151.20910207195533,
+                                "department": "Painting",
+                                "artist_id": 2,
+                                "artist_title": "Vincent Namatjira",
+                                "created_date": "2022-10-12T03:59:35.243000Z",
+                                "last_modified": "2022-10-12T03:59:35.243000Z",
+                                "on_display": True
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all displayed artworks.')
+            200: OpenApiResponse(response=int, description='Returns a page of displayed artworks with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )        
     def get(self, request, format=None):
+        cached, generation = self.feed_cache.get(request)
+        if cached is not None:
+            return cached
         try:
-            artworks = Artwork.objects.filter(on_display__in=[True]) #workaround for bug in Django querysets for booleans
+            fields = sparse_fields(request, ArtworkSerializer)
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            artworks = project(Artwork.objects.filter(on_display__in=[True]), fields) #workaround for bug in Django querysets for booleans
         except:
             return Response({'message': 'No artworks are displayed'}, status=status.HTTP_404_NOT_FOUND)
-        artwork_serializer = ArtworkSerializer(artworks, many=True)
-        return Response(artwork_serializer.data)
\ No newline at end of file
+        validators = queryset_validators(request, artworks)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        if wants_stream(request):
+            return validators.apply(stream_json(artworks, ArtworkSerializer, fields=fields))
+        paginator = KeysetPagination()
+        artwork_serializer = values_serializer(ArtworkSerializer, fields)
+        page = paginator.paginate_queryset(artwork_serializer.values(artworks), request, view=self)
+        return self.feed_cache.store(request, validators.apply(paginator.get_paginated_response(artwork_serializer.data(page))), generation)
+
+
+class ArtworkFacets(APIView):
+    """
+    View to count artworks by department, medium, place of origin, public domain status and display status.
+
+    * Requires basic or bearer token authentication.
+    * Only users with accounts can view artwork facets
+    * Query parameters named after a facet field restrict the counts to matching artworks
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    facet_fields = ['department', 'medium_display', 'place_of_origin', 'is_public_domain', 'on_display']
+    boolean_fields = ['is_public_domain', 'on_display']
+
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Returned data',
+                status_codes=['200'],
+                value =
+                {
+                    "department": [
+                        {"value": "Painting", "count": 12},
+                        {"value": "Photography", "count": 7}
+                    ],
+                    "medium_display": [
+                        {"value": "oil on linen", "count": 9},
+                        {"value": "cibachrome print, framed", "count": 7},
+                        {"value": "acrylic on found book pages, framed", "count": 3}
+                    ],
+                    "place_of_origin": [
+                        {"value": "Sydney", "count": 11},
+                        {"value": "Albury", "count": 8}
+                    ],
+                    "is_public_domain": [
+                        {"value": False, "count": 19}
+                    ],
+                    "on_display": [
+                        {"value": True, "count": 10},
+                        {"value": False, "count": 9}
+                    ]
+                },
+            )
+        ],
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the number of artworks with each value of each facet field.'),
+            400: OpenApiResponse(response=int, description='A boolean facet filter was not true or false.'),
+        }
+    )
+    def get(self, request, format=None):
+        """
+        Return facet counts.
+        """
+        auth_denied = GroupPermissions.UsersOnly(request.user.role, 'view artwork facets')
+        if auth_denied is None:
+            try:
+                match = facet_match(request, self.facet_fields, self.boolean_fields)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(facet_counts(Artwork, self.facet_fields, match))
+        else:
+            return auth_denied
+
+
+class ArtworkImage(APIView):
+    """
+    View to get the image of an artwork, resized and in the best format the client accepts.
+
+    * Requires basic or bearer token authentication.
+    * Only users with accounts can view artworks
+    * AVIF or WebP is sent if listed in `Accept` and supported, otherwise JPEG
+    * Resized images are cached on disk, see `artgallery.images`
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    def perform_content_negotiation(self, request, force=False):
+        # `Accept` names image formats here, which no renderer offers, so it
+        # must not make DRF refuse the request. Errors are still sent as JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('w', int, description='Largest width in pixels, up to {}. Images are never enlarged.'.format(images.MAX_DIMENSION)),
+            OpenApiParameter('h', int, description='Largest height in pixels, up to {}. The aspect ratio is kept.'.format(images.MAX_DIMENSION)),
+            OpenApiParameter('q', int, description='Quality from 1 to 100. Defaults to {}.'.format(images.DEFAULT_QUALITY)),
+        ],
+        responses={
+            200: OpenApiResponse(response=bytes, description='Returns the image as AVIF, WebP or JPEG.'),
+            304: OpenApiResponse(response=int, description='The image has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
+            400: OpenApiResponse(response=int, description='Invalid size or quality.'),
+            404: OpenApiResponse(response=int, description='The given id does not match any artwork with a readable image.'),
+        }
+    )
+    def get(self, request, pk):
+        """
+        Return the image of an artwork.
+        """
+        auth_denied = GroupPermissions.UsersOnly(request.user.role, 'view all artworks')
+        if auth_denied is None:
+            try:
+                variant = images.parse_variant(request.query_params, request.META.get('HTTP_ACCEPT', ''))
+            except ValueError:
+                return Response({'message': 'w and h must be sizes of up to {} pixels and q a quality from 1 to 100'.format(images.MAX_DIMENSION)}, status=status.HTTP_400_BAD_REQUEST)
+            record = Artwork.objects.filter(pk=pk).values('image', 'last_modified').first()
+            if record is None or not record['image']:
+                return Response({'message': 'The artwork does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            image_field = Artwork._meta.get_field('image')
+            if not is_stored_under(record['image'], image_field.upload_to):
+                # Only files in the images directory are served, whatever name a record holds.
+                return Response({'message': 'The image of the artwork is missing'}, status=status.HTTP_404_NOT_FOUND)
+            validators = instance_validators(request, Artwork, pk, record['last_modified'])
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                patch_vary_headers(not_modified, ('Accept',))
+                return not_modified
+            try:
+                file = images.open_variant(image_field.storage, record['image'], variant)
+            except FileNotFoundError:
+                return Response({'message': 'The image of the artwork is missing'}, status=status.HTTP_404_NOT_FOUND)
+            except (UnidentifiedImageError, Image.DecompressionBombError):
+                return Response({'message': 'The image of the artwork cannot be read'}, status=status.HTTP_404_NOT_FOUND)
+            response = FileResponse(file, content_type=variant.media_type)
+            patch_vary_headers(response, ('Accept',))
+            return validators.apply(response)
+        else:
+            return auth_denied
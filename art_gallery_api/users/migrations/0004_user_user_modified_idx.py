@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_is_admin_alter_user_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_modified', 'id'], name='user_modified_idx'),
+        ),
+    ]
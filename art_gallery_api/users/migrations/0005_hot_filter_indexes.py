@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_user_modified_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'last_modified', 'id'], name='user_role_idx'),
+        ),
+    ]
@@ -69,6 +69,12 @@ class User(AbstractUser):
 
     REQUIRED_FIELDS = ['first_name', 'last_name', 'role', 'password']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['last_modified', 'id'], name='user_modified_idx'),
+            models.Index(fields=['role', 'last_modified', 'id'], name='user_role_idx'),
+        ]
+
     USERNAME_FIELD = 'email'
 
     def __str__(self):
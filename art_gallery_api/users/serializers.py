@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from artgallery.fieldsets import SparseFieldsMixin
 from .models import User
 from django.contrib.auth.hashers import make_password
 
-class UserSerializer(serializers.Serializer):
+class UserSerializer(SparseFieldsMixin, serializers.Serializer):
     first_name = serializers.CharField(max_length=80, required=True)
     last_name = serializers.CharField(max_length=80, required=True)
     email = serializers.EmailField(required=True)
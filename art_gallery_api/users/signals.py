@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from artgallery.authentication import credential_cache
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_credentials(sender, instance, **kwargs):
+    """
+    Drop the user's cached credentials whenever it changes, since any save may
+    change the password, role or active status the cache was based on.
+    """
+    credential_cache.invalidate_user(instance.pk)
@@ -4,4 +4,5 @@ from users import views
 urlpatterns = [
     re_path(r'api/users$', views.ListUsers.as_view()),
     re_path(r'api/users/(?P<pk>[0-9]+)$', views.ListUserDetail.as_view()),
+    re_path(r'api/token$', views.ObtainToken.as_view()),
 ]
\ No newline at end of file
@@ -1,9 +1,16 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 from rest_framework import serializers
+from artgallery.authentication import CachedBasicAuthentication, SignedTokenAuthentication, issue_token, token_ttl
+from artgallery.conditional import instance_validators, last_modified_of, queryset_validators
+from artgallery.fieldsets import fieldset_parameters, project, sparse_fields
 from artgallery.groups import GroupPermissions
+from artgallery.pagination import KeysetPagination
+from artgallery.streaming import stream_json, stream_parameter, wants_stream
+from artgallery.values import values_serializer
+from django.contrib.auth import authenticate
 from django.db import DatabaseError
 from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer, OpenApiResponse
 from users.models import User
@@ -13,59 +20,77 @@ class ListUsers(APIView):
     """
     View to list all users in the system from model: `users.User`.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only staff and managers are able to access this view.
     * Only managers can add users
     """
     
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
 
     @extend_schema(
+        parameters=[stream_parameter, *fieldset_parameters],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "first_name": "Staff",
-                            "last_name": "McStaffson",
-                            "email": "mcstaffson@gallery.com",
-                            "role": "ST",
-                            "password": "argon2$argon2id$v=19$m=102400,t=2,p=8$NFA1cjJkRXVVZTFWZFhNZTVqQjNMTA$QbILnel3w1j+jts+jQdkp2qhpKeMBeMM8HXmCUcwHg4",
-                            "description": "",
-                            "created_date": "2022-10-11T11:27:02.375000Z",
-                            "last_modified": "2022-10-13T12:45:20.498000Z"
-                        },
-                        {
-                            "id": 2,
-                            "first_name": "Manager",
-                            "last_name": "McManagerson",
-                            "email": "mcmanagerson@gallery.com",
-                            "role": "MA",
-                            "password": "argon2$argon2id$v=19$m=102400,t=2,p=8$VmJrbFZLR1AyTENsczZFNDVLWG50YQ$jjPzZBqB+ZN5UmWixEefYsZTFTWOb0wDCL8BH0BqU4I",
-                            "description": "A fine manager",
-                            "created_date": "2022-10-11T11:28:02.839000Z",
-                            "last_modified": "2022-10-13T12:45:32.570000Z"
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "first_name": "Staff",
+                                "last_name": "McStaffson",
+                                "email": "mcstaffson@gallery.com",
+                                "role": "ST",
+                                "password": "argon2$argon2id$v=19$m=102400,t=2,p=8$NFA1cjJkRXVVZTFWZFhNZTVqQjNMTA$QbILnel3w1j+jts+jQdkp2qhpKeMBeMM8HXmCUcwHg4",
+                                "description": "",
+                                "created_date": "2022-10-11T11:27:02.375000Z",
+                                "last_modified": "2022-10-13T12:45:20.498000Z"
+                            },
+                            {
+                                "id": 2,
+                                "first_name": "Manager",
+                                "last_name": "McManagerson",
+                                "email": "mcmanagerson@gallery.com",
+                                "role": "MA",
+                                "password": "argon2$argon2id$v=19$m=102400,t=2,p=8$VmJrbFZLR1AyTENsczZFNDVLWG50YQ$jjPzZBqB+ZN5UmWixEefYsZTFTWOb0wDCL8BH0BqU4I",
+                                "description": "A fine manager",
+                                "created_date": "2022-10-11T11:28:02.839000Z",
+                                "last_modified": "2022-10-13T12:45:32.570000Z"
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all users.')
+            200: OpenApiResponse(response=int, description='Returns a page of users with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )
     def get(self, request, format=None):
         """
-        Return a list of all users.
+        Return a page of users, ordered by last modification.
         * Only staff and managers are able to access this view.
         """
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'view users')
         if auth_denied is None:
-            users = User.objects.all()
-            users_serializer = UserSerializer(users, many=True)
-            return Response(users_serializer.data)
+            try:
+                fields = sparse_fields(request, UserSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            users = project(User.objects.all(), fields)
+            validators = queryset_validators(request, users)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            if wants_stream(request):
+                return validators.apply(stream_json(users, UserSerializer, fields=fields))
+            paginator = KeysetPagination()
+            users_serializer = values_serializer(UserSerializer, fields)
+            page = paginator.paginate_queryset(users_serializer.values(users), request, view=self)
+            return validators.apply(paginator.get_paginated_response(users_serializer.data(page)))
         else:
             return auth_denied
 
@@ -144,15 +169,16 @@ class ListUserDetail(APIView):
     """
     View to list a single user in the system.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only staff and managers are able to access this view.
     * Only managers can update a user's role
     * Only managers can delete a user
     """
 
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
 
     @extend_schema(
+        parameters=fieldset_parameters,
         examples=[
             OpenApiExample(
                 'Returned data for the requested user.',
@@ -175,6 +201,7 @@ class ListUserDetail(APIView):
         ],
         responses={
             200: OpenApiResponse(response=int, description='Returns the requested user.'),
+            304: OpenApiResponse(response=int, description='The user has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
             404: OpenApiResponse(response=int, description='The given id does not match any user is in the database.'),
         }
     )
@@ -185,11 +212,22 @@ class ListUserDetail(APIView):
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'view a user')
         if auth_denied is None:
             try:
-                user = User.objects.get(pk=pk)
+                fields = sparse_fields(request, UserSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            last_modified = last_modified_of(User, pk)
+            if last_modified is None:
+                return Response({'message': 'The user does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            validators = instance_validators(request, User, pk, last_modified)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            try:
+                user = project(User.objects, fields).get(pk=pk)
             except User.DoesNotExist:
                 return Response({'message': 'The user does not exist'}, status=status.HTTP_404_NOT_FOUND)
-            user_serializer = UserSerializer(user)
-            return Response(user_serializer.data)
+            user_serializer = UserSerializer(user, fields=fields)
+            return validators.apply(Response(user_serializer.data))
         else:
             return auth_denied
 
@@ -287,4 +325,52 @@ class ListUserDetail(APIView):
             user.delete()
             return JsonResponse({'message': 'User was deleted.'}, status=status.HTTP_204_NO_CONTENT)
         else:
-            return auth_denied
\ No newline at end of file
+            return auth_denied
+
+
+class ObtainToken(APIView):
+    """
+    View to exchange an email and password for a signed bearer token.
+
+    * Allows anonymous access
+    * The password is checked once here, and the token is then accepted by every
+      view as `Authorization: Bearer <token>` until it expires.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Issued token',
+                status_codes=['200'],
+                value =
+                {
+                    "token": "eyJpZCI6Miwicm9sZSI6Ik1BIn0:1onxTq:3Kx6mX1Tt7Qn3dY2nUuHSn2CwXU7X6cJvJcT7aYw9Xg",
+                    "expires_in": 900
+                },
+            )
+        ],
+        request={
+            'application/x-www-form-urlencoded': inline_serializer(
+                name='InlineOneOffSerializerToken',
+                fields={
+                    'email': serializers.EmailField(),
+                    'password': serializers.CharField(max_length=100),
+                   }
+            )
+        },
+        responses={
+            200: OpenApiResponse(response=int, description='Returns a signed token and its lifetime in seconds.'),
+            401: OpenApiResponse(response=int, description='The email or password is incorrect, or the user is inactive.'),
+        }
+    )
+    def post(self, request, format=None):
+        """
+        Issue a token carrying the user id and role.
+        """
+        user = authenticate(request=request, email=request.data.get('email'), password=request.data.get('password'))
+        if user is None or not user.is_active:
+            return Response({'message': 'Invalid email or password'}, status=status.HTTP_401_UNAUTHORIZED)
+        return Response({'token': issue_token(user), 'expires_in': token_ttl()})
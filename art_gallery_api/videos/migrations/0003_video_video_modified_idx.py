@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0002_rename_createddate_video_created_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['last_modified', 'id'], name='video_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from artgallery.search import create_search_index, drop_search_index
+
+# The weights the index is made with. Later changes need a migration of their own.
+WEIGHTS = {
+    'title': 10,
+    'description': 1,
+}
+
+
+def create_index(apps, schema_editor):
+    create_search_index(apps.get_model('videos', 'Video'), WEIGHTS, schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(apps.get_model('videos', 'Video'), schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0003_video_video_modified_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1 on 2026-10-16 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0004_video_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['published', 'last_modified', 'id'], name='video_published_idx'),
+        ),
+    ]
@@ -18,6 +18,12 @@ class Video(models.Model):
     last_modified = models.DateTimeField(auto_now=True, blank=False, editable=False)
     published = models.BooleanField(blank=False,default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_modified', 'id'], name='video_modified_idx'),
+            models.Index(fields=['published', 'last_modified', 'id'], name='video_published_idx'),
+        ]
+
     def __str__(self):
         """ The representation that is visible in the admin """
         return self.title
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from artgallery.fieldsets import SparseFieldsMixin
 from videos.models import Video
 
-class VideoSerializer(serializers.ModelSerializer):
+class VideoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Video
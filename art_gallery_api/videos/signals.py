@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from artgallery.cache import FeedCache
+from videos.models import Video
+
+
+@receiver([post_save, post_delete], sender=Video)
+def invalidate_feed_cache(sender, instance, **kwargs):
+    """
+    Drop the cached videos feeds whenever a video changes, since any field
+    of it may appear in them.
+    """
+    FeedCache(sender).invalidate()
@@ -1,3 +1,35 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.http import HttpResponse
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from users.models import User
+from videos.views import VideoFile
+
+
+class VideoFileTests(SimpleTestCase):
+
+    def get(self, name):
+        """Request the file of a video record whose stored name is `name`."""
+        request = APIRequestFactory().get('/api/videos/1/file')
+        force_authenticate(request, user=User(role=User.MANAGER))
+        record = {'video': name, 'last_modified': timezone.now()}
+        with mock.patch('videos.views.Video.objects') as objects, mock.patch('videos.views.range_response', return_value=HttpResponse(b'video')) as range_response:
+            objects.all.return_value.filter.return_value.values.return_value.first.return_value = record
+            response = VideoFile.as_view()(request, pk=1)
+        return response, range_response
+
+    def test_serves_files_in_the_videos_directory(self):
+        response, range_response = self.get('data/videos/clip.mp4')
+        self.assertEqual(response.status_code, 200)
+        range_response.assert_called_once()
+        self.assertEqual(range_response.call_args[0][2], 'data/videos/clip.mp4')
+
+    def test_does_not_serve_files_outside_the_videos_directory(self):
+        for name in ('artgallery/settings.py', '.env', 'data/videos/../../.env', '/etc/passwd'):
+            with self.subTest(name=name):
+                response, range_response = self.get(name)
+                self.assertEqual(response.status_code, 404)
+                range_response.assert_not_called()
@@ -4,5 +4,7 @@ from videos import views
 urlpatterns = [
     re_path(r'api/videos$', views.ListVideos.as_view()),
     re_path(r'api/videos/(?P<pk>[0-9]+)$', views.ListVideoDetail.as_view()),
-    re_path(r'api/videos/published$', views.ListPublishedVideos.as_view())
+    re_path(r'api/videos/(?P<pk>[0-9]+)/file$', views.VideoFile.as_view()),
+    re_path(r'api/videos/published$', views.ListPublishedVideos.as_view()),
+    re_path(r'api/videos/facets$', views.VideoFacets.as_view()),
 ]
\ No newline at end of file
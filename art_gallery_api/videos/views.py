@@ -1,9 +1,20 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import authentication, permissions
+from rest_framework import permissions
 from rest_framework import serializers
+from artgallery.authentication import CachedBasicAuthentication, SignedTokenAuthentication
+from artgallery.batch import ids_parameter, ids_response
+from artgallery.bulk import bulk_create_response, is_bulk_request, is_stored_under
+from artgallery.cache import FeedCache
+from artgallery.facets import facet_counts, facet_match
+from artgallery.conditional import instance_validators, last_modified_of, queryset_validators
+from artgallery.fieldsets import fieldset_parameters, project, sparse_fields
 from artgallery.groups import GroupPermissions
+from artgallery.pagination import KeysetPagination
+from artgallery.ranges import range_response
+from artgallery.streaming import stream_json, stream_parameter, wants_stream
+from artgallery.values import values_serializer
 from django.db import DatabaseError
 from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer, OpenApiResponse
 from videos.models import Video
@@ -14,56 +25,77 @@ class ListVideos(APIView):
     """
     View to list all videos in the system from model: `videos.Videos`.
 
-    * Requires basic authentication
+    * Requires basic or bearer token authentication.
     * Only staff and managers are able to view all, update or create videos.
     * Only managers can delete videos
     """
     
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     
     @extend_schema(
+        parameters=[stream_parameter, ids_parameter, *fieldset_parameters],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "title": "\"Artist statement\"",
-                            "video": "/data/videos/video1.mov",
-                            "thumbnail": "/data/videos/thumbnails/video1thumb.png",
-                            "production_date": 2021,
-                            "place_of_origin": "Sydney",
-                            "length": "5min 45sec",
-                            "description": "",
-                            "is_public_domain": False,
-                            "creator": "Staff McStaffson",
-                            "subject": "Artist McArtson",
-                            "created_date": "2022-10-12T04:08:56.603000Z",
-                            "last_modified": "2022-10-12T04:08:56.603000Z",
-                            "published": False
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "\"Artist statement\"",
+                                "video": "/data/videos/video1.mov",
+                                "thumbnail": "/data/videos/thumbnails/video1thumb.png",
+                                "production_date": 2021,
+                                "place_of_origin": "Sydney",
+                                "length": "5min 45sec",
+                                "description": "",
+                                "is_public_domain": False,
+                                "creator": "Staff McStaffson",
+                                "subject": "Artist McArtson",
+                                "created_date": "2022-10-12T04:08:56.603000Z",
+                                "last_modified": "2022-10-12T04:08:56.603000Z",
+                                "published": False
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all videos.')
+            200: OpenApiResponse(response=int, description='Returns a page of videos with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )
     def get(self, request, format=None):
         """
-        Return a list of all videos.
+        Return a page of videos, ordered by last modification.
         * Only gallery staff are able to access this view.
         """
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'view all videos')
         if auth_denied is None:
-            videos = Video.objects.all()
+            try:
+                fields = sparse_fields(request, VideoSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            videos = project(Video.objects.all(), fields)
+            by_ids = ids_response(request, videos, VideoSerializer, fields)
+            if by_ids is not None:
+                return by_ids
             title = request.GET.get('title', None)
             if title is not None:
                 videos = videos.filter(title__icontains=title)
-            videos_serializer = VideoSerializer(videos, many=True)
-            return Response(videos_serializer.data)
+            validators = queryset_validators(request, videos)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            if wants_stream(request):
+                return validators.apply(stream_json(videos, VideoSerializer, fields=fields))
+            paginator = KeysetPagination()
+            videos_serializer = values_serializer(VideoSerializer, fields)
+            page = paginator.paginate_queryset(videos_serializer.values(videos), request, view=self)
+            return validators.apply(paginator.get_paginated_response(videos_serializer.data(page)))
         else:
             return auth_denied
 
@@ -100,7 +132,8 @@ class ListVideos(APIView):
             )
         ],
         request={
-             'multipart/form-data': VideoSerializer
+             'multipart/form-data': VideoSerializer,
+            'application/json': VideoSerializer(many=True)
         },
         responses={
             201: OpenApiResponse(response=int, description='Successful creation will return the input data.'),
@@ -112,9 +145,12 @@ class ListVideos(APIView):
         Add a video to the list of all videos.
 
         * Only managers or staff can add videos
+        * A JSON array creates many videos at once, reporting errors for each item
         """
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'add new videos')
         if auth_denied is None:
+            if is_bulk_request(request):
+                return bulk_create_response(VideoSerializer, request.data)
             video_serializer = VideoSerializer(data=request.data)
             if video_serializer.is_valid():
                 video_serializer.save()
@@ -147,15 +183,16 @@ class ListVideoDetail(APIView):
     """
     View to list a single video in the system.
 
-    * Requires basic authentication.
+    * Requires basic or bearer token authentication.
     * Only education users can view videos
     * Only managers or staff can update a video
     * Only managers can delete a video
     """
     
-    authentication_classes = [authentication.BasicAuthentication]
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
     
     @extend_schema(
+        parameters=fieldset_parameters,
         examples=[
             OpenApiExample(
                 'Returned data for the requested video.',
@@ -183,6 +220,7 @@ class ListVideoDetail(APIView):
         ],
         responses={
             200: OpenApiResponse(response=int, description='Returns the requested video.'),
+            304: OpenApiResponse(response=int, description='The video has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
             404: OpenApiResponse(response=int, description='The given id does not match any video is in the database.'),
         }
     )
@@ -193,11 +231,22 @@ class ListVideoDetail(APIView):
         auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'view all videos')
         if auth_denied is None:
             try:
-                video = Video.objects.get(pk=pk)
+                fields = sparse_fields(request, VideoSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            last_modified = last_modified_of(Video, pk)
+            if last_modified is None:
+                return Response({'message': 'The video does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            validators = instance_validators(request, Video, pk, last_modified)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            try:
+                video = project(Video.objects, fields).get(pk=pk)
             except Video.DoesNotExist:
                 return Response({'message': 'The video does not exist'}, status=status.HTTP_404_NOT_FOUND)
-            video_serializer = VideoSerializer(video)
-            return Response(video_serializer.data)
+            video_serializer = VideoSerializer(video, fields=fields)
+            return validators.apply(Response(video_serializer.data))
         else:
             return auth_denied
     
@@ -293,46 +342,166 @@ class ListPublishedVideos(APIView):
     View to list the videos that are currrently published.
 
     * Only educators and gallery staff can access this view
+    * Rendered pages are cached until a video changes
     """
+    feed_cache = FeedCache(Video)
 
     @extend_schema(
+        parameters=[stream_parameter, *fieldset_parameters],
         examples=[
             OpenApiExample(
                 'Returned data',
                 status_codes=['200'],
                 value =
-                    [
-                        {
-                            "id": 1,
-                            "title": "\"Artist statement\"",
-                            "video": "/data/videos/video1.mov",
-                            "thumbnail": "/data/videos/thumbnails/video1thumb.png",
-                            "production_date": 2021,
-                            "place_of_origin": "Sydney",
-                            "length": "5min 45sec",
-                            "description": "",
-                            "is_public_domain": False,
-                            "creator": "Staff McStaffson",
-                            "subject": "Artist McArtson",
-                            "created_date": "2022-10-12T04:08:56.603000Z",
-                            "last_modified": "2022-10-12T04:08:56.603000Z",
-                            "published": True
-                        }
-                    ],
+                    {
+                        "next": None,
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "\"Artist statement\"",
+                                "video": "/data/videos/video1.mov",
+                                "thumbnail": "/data/videos/thumbnails/video1thumb.png",
+                                "production_date": 2021,
+                                "place_of_origin": "Sydney",
+                                "length": "5min 45sec",
+                                "description": "",
+                                "is_public_domain": False,
+                                "creator": "Staff McStaffson",
+                                "subject": "Artist McArtson",
+                                "created_date": "2022-10-12T04:08:56.603000Z",
+                                "last_modified": "2022-10-12T04:08:56.603000Z",
+                                "published": True
+                            }
+                        ]
+                    },
             )
         ],
         responses={
-            200: OpenApiResponse(response=int, description='Returns the list of all published videos.')
+            200: OpenApiResponse(response=int, description='Returns a page of published videos with cursors for the next and previous pages.'),
+            304: OpenApiResponse(response=int, description='The page has not changed since the ETag sent in If-None-Match.')
         }
     )       
     def get(self, request, format=None):
         auth_denied = GroupPermissions.EducatorOnly(request.user.role, 'view published videos')
         if auth_denied is None:
+            cached, generation = self.feed_cache.get(request)
+            if cached is not None:
+                return cached
             try:
-                videos = Video.objects.filter(published__in=[True]) #workaround for bug in Django querysets for booleans
+                fields = sparse_fields(request, VideoSerializer)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                videos = project(Video.objects.filter(published__in=[True]), fields) #workaround for bug in Django querysets for booleans
             except:
                 return Response({'message': 'No videos are published'}, status=status.HTTP_404_NOT_FOUND)
-            video_serializer = VideoSerializer(videos, many=True)
-            return Response(video_serializer.data)
+            validators = queryset_validators(request, videos)
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+            if wants_stream(request):
+                return validators.apply(stream_json(videos, VideoSerializer, fields=fields))
+            paginator = KeysetPagination()
+            video_serializer = values_serializer(VideoSerializer, fields)
+            page = paginator.paginate_queryset(video_serializer.values(videos), request, view=self)
+            return self.feed_cache.store(request, validators.apply(paginator.get_paginated_response(video_serializer.data(page))), generation)
+        else:
+            return auth_denied
+
+
+class VideoFacets(APIView):
+    """
+    View to count videos by publication status.
+
+    * Requires basic or bearer token authentication.
+    * Only staff and managers can view video facets
+    * Query parameters named after a facet field restrict the counts to matching videos
+    """
+
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+    facet_fields = ['published']
+    boolean_fields = ['published']
+
+    @extend_schema(
+        examples=[
+            OpenApiExample(
+                'Returned data',
+                status_codes=['200'],
+                value =
+                {
+                    "published": [
+                        {"value": False, "count": 4},
+                        {"value": True, "count": 2}
+                    ]
+                },
+            )
+        ],
+        responses={
+            200: OpenApiResponse(response=int, description='Returns the number of videos with each value of each facet field.'),
+            400: OpenApiResponse(response=int, description='A boolean facet filter was not true or false.'),
+        }
+    )
+    def get(self, request, format=None):
+        """
+        Return facet counts.
+        """
+        auth_denied = GroupPermissions.StaffOrManagerOnly(request.user.role, 'view video facets')
+        if auth_denied is None:
+            try:
+                match = facet_match(request, self.facet_fields, self.boolean_fields)
+            except ValueError as error:
+                return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(facet_counts(Video, self.facet_fields, match))
+        else:
+            return auth_denied
+
+
+class VideoFile(APIView):
+    """
+    View to stream the file of a video, in whole or in byte ranges.
+
+    * Requires basic or bearer token authentication.
+    * Published videos can be watched by education users, staff and managers
+    * Unpublished videos can only be watched by staff and managers
+    * `Range` and `If-Range` are supported, so players can seek without downloading what comes before
+    """
+    authentication_classes = [CachedBasicAuthentication, SignedTokenAuthentication]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Players send `Accept` for media types no renderer offers, which must
+        # not make DRF refuse the request. Errors are still sent as JSON.
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        responses={
+            200: OpenApiResponse(response=bytes, description='Returns the whole video file.'),
+            206: OpenApiResponse(response=bytes, description='Returns the byte range of the video file asked for in Range.'),
+            304: OpenApiResponse(response=int, description='The video has not changed since the ETag or date sent in If-None-Match or If-Modified-Since.'),
+            404: OpenApiResponse(response=int, description='The given id does not match any video with a file that the user can watch.'),
+            416: OpenApiResponse(response=int, description='The range asked for starts past the end of the file.'),
+        }
+    )
+    def get(self, request, pk):
+        """
+        Return the file of a video.
+        """
+        auth_denied = GroupPermissions.EducatorOnly(request.user.role, 'watch videos')
+        if auth_denied is None:
+            videos = Video.objects.all()
+            if GroupPermissions.StaffOrManagerOnly(request.user.role) is not None:
+                # Unpublished videos are hidden from education users, so they look missing.
+                videos = videos.filter(published__in=[True]) #workaround for bug in Django querysets for booleans
+            video = videos.filter(pk=pk).values('video', 'last_modified').first()
+            if video is None or not video['video']:
+                return Response({'message': 'The video does not exist'}, status=status.HTTP_404_NOT_FOUND)
+            video_field = Video._meta.get_field('video')
+            if not is_stored_under(video['video'], video_field.upload_to):
+                # Only files in the videos directory are served, whatever name a record holds.
+                return Response({'message': 'The file of the video is missing'}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                return range_response(request, video_field.storage, video['video'], video['last_modified'])
+            except FileNotFoundError:
+                return Response({'message': 'The file of the video is missing'}, status=status.HTTP_404_NOT_FOUND)
         else:
-            return auth_denied
\ No newline at end of file
+            return auth_denied